@@ -0,0 +1,270 @@
+"""
+Benchmarks PyToCP against synthetic content packs.
+
+Every scenario builds a fresh pack in a temporary folder, once timed and once under
+tracemalloc, and reports throughput, peak memory and, for scenarios that compile a mod, output
+size. Results are saved as json so runs on different commits can be compared.
+
+Scenarios:
+    build: Entry construction across many targets and ContentFiles, then Mod.Create.
+    curry: Entries built from an Entry_Curry template, then Mod.Create.
+    eval: eval_entry and eval_entries lookups against a fake unpacked content folder, written once before timing.
+
+Usage:
+    python benchmarks/packs.py
+    python benchmarks/packs.py --sizes 1000 10000 --out before.json
+    python benchmarks/packs.py --sizes 1000 10000 --compare before.json
+"""
+
+from os.path import abspath, dirname, join, getsize
+from os import walk, makedirs
+from contextlib import redirect_stdout
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from typing import Any, Callable
+import io
+import json
+import platform
+import subprocess
+import sys
+import tracemalloc
+
+sys.path.insert(0, join(dirname(abspath(__file__)), "..", "src"))
+
+from pytocp import Mod, Entry, ContentFile, Entry_Curry, eval_entry, eval_entries
+
+TARGETS = 50
+"""Data targets entries are spread across."""
+ENTRIES_PER_FILE = 1000
+"""Entries per ContentFile. A quarter of the entries stay in content.json."""
+VANILLA_KEYS = 500
+"""Keys per fake unpacked content file."""
+
+
+def _new_mod(out: str) -> Mod:
+    """Returns a new mod writing to ``out``."""
+    mod = Mod("Bench", "bench", "1.0.0", "Synthetic benchmark pack.", "bench.Pack")
+    mod.output_fp = [out]
+    return mod
+
+
+def _output_size(out: str) -> int:
+    """Returns the bytes of every file under ``out``."""
+    return sum(getsize(join(root, name)) for root, _, names in walk(out) for name in names)
+
+
+def _entry(i: int) -> dict[str, Any]:
+    """Returns synthetic entry data shaped like an object entry."""
+    return {
+        "Name": f"Item{i}",
+        "DisplayName": f"Item {i}",
+        "Description": "A synthetic benchmark item.",
+        "Type": "Basic",
+        "Category": -2,
+        "Price": i % 1000,
+        "ContextTags": ["bench", f"group_{i % 10}"],
+        "CustomFields": {"Index": str(i)}
+    }
+
+
+def build(n: int, out: str, content: str) -> dict[str, Any]:
+    """Builds ``n`` entries over TARGETS targets, three quarters of them in ContentFiles."""
+    mod = _new_mod(out)
+
+    start = perf_counter()
+
+    in_files = n * 3 // 4
+    for first in range(0, in_files, ENTRIES_PER_FILE):
+        mod.AUTO_REGISTER = False
+        entries = [
+            Entry(f"_E{i}", _entry(i), action="EditData", target=f"Data/Bench{i % TARGETS}")
+            for i in range(first, min(first + ENTRIES_PER_FILE, in_files))
+        ]
+        mod.AUTO_REGISTER = True
+        ContentFile(f"part{first // ENTRIES_PER_FILE}", *entries)
+
+    for i in range(in_files, n):
+        Entry(f"_E{i}", _entry(i), action="EditData", target=f"Data/Bench{i % TARGETS}")
+
+    constructed = perf_counter()
+    mod.Create()
+    created = perf_counter()
+
+    return {"construct": constructed - start, "create": created - constructed}
+
+
+def curry(n: int, out: str, content: str) -> dict[str, Any]:
+    """Builds ``n`` entries from a curried template with nested fields."""
+    mod = _new_mod(out)
+
+    template = _entry(0)
+    template["GeodeDrops"] = [{"Id": f"Drop{i}", "ItemId": f"(O){i}", "Chance": 0.1} for i in range(20)]
+
+    start = perf_counter()
+
+    Item = Entry_Curry(action="EditData", target="Data/Objects", entry=template)
+    for i in range(n):
+        Item(entry_id=f"_C{i}", entry={"Name": f"Item{i}", "Price": i, "CustomFields": {"Index": str(i)}})
+
+    constructed = perf_counter()
+    mod.Create()
+    created = perf_counter()
+
+    return {"construct": constructed - start, "create": created - constructed}
+
+
+def _fake_content(fp: str) -> None:
+    """Writes a fake unpacked content folder with TARGETS data files."""
+    makedirs(join(fp, "Data"), exist_ok=True)
+
+    for t in range(TARGETS):
+        with open(join(fp, "Data", f"Bench{t}.json"), "w") as file:
+            json.dump({f"Vanilla{k}": _entry(k) for k in range(VANILLA_KEYS)}, file, indent=4)
+
+
+def evaluate(n: int, out: str, content: str) -> dict[str, Any]:
+    """Evaluates ``n`` entries one by one with eval_entry, then all at once with eval_entries, against ``content``."""
+    mod = _new_mod(out)
+    mod.unpacked_content_fp = content
+    mod.content_cache.clear()
+
+    entries = Entry.from_records(
+        ((f"_E{i}", _entry(i)) for i in range(n)),
+        action="EditData",
+        target="Data/Bench0"
+    )
+    entries += [
+        Entry(f"_T{i}", _entry(i), action="EditData", target=f"Data/Bench{i % TARGETS}")
+        for i in range(min(n, TARGETS * 10))
+    ]
+
+    start = perf_counter()
+    for entry in entries:
+        eval_entry(entry)
+    single = perf_counter()
+    eval_entries(entries)
+    batched = perf_counter()
+
+    return {"eval_entry": single - start, "eval_entries": batched - single}
+
+
+SCENARIOS: dict[str, Callable[[int, str, str], dict[str, Any]]] = {
+    "build": build,
+    "curry": curry,
+    "eval": evaluate
+}
+"""Scenarios by name. Each is called with the entry count, an empty output folder and the fake unpacked content folder."""
+
+COMPILING = ("build", "curry")
+"""Scenarios that compile a mod, and so have an output size."""
+
+
+def run(scenario: str, n: int, content: str) -> dict[str, Any]:
+    """Runs a scenario twice, timed and then under tracemalloc, and returns its metrics.
+
+    Args:
+        scenario (str): The scenario name (see: SCENARIOS).
+        n (int): How many entries to build.
+        content (str): The fake unpacked content folder (see: _fake_content).
+
+    Returns:
+        dict[str, Any]: The metrics. "output_bytes" is None for scenarios that don't compile a mod.
+    """
+    func = SCENARIOS[scenario]
+
+    with TemporaryDirectory() as out, redirect_stdout(io.StringIO()):
+        start = perf_counter()
+        phases = func(n, out, content)
+        total = perf_counter() - start
+        size = _output_size(out) if scenario in COMPILING else None
+
+    with TemporaryDirectory() as out, redirect_stdout(io.StringIO()):
+        tracemalloc.start()
+        func(n, out, content)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    return {
+        "entries": n,
+        "seconds": total,
+        "entries_per_second": n / total if total else None,
+        "peak_bytes": peak,
+        "output_bytes": size,
+        "phases": phases
+    }
+
+
+def _commit() -> "str|None":
+    """Returns the current git commit, if the repo is a git checkout."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=dirname(abspath(__file__)), capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def compare(results: dict[str, Any], baseline: dict[str, Any]) -> None:
+    """Prints how ``results`` changed relative to ``baseline``."""
+    print(f"\nCompared to {baseline.get('commit') or 'baseline'}:")
+
+    for key, now in results["results"].items():
+        before = baseline["results"].get(key)
+        if before is None:
+            continue
+
+        changes = ", ".join(
+            f"{metric} {now[metric] / before[metric]:.2f}x"
+            for metric in ("seconds", "peak_bytes", "output_bytes")
+            if before.get(metric) and not now[metric] is None
+        )
+        print(f"  {key:>14}: {changes}")
+
+
+def main(argv: list[str] = None) -> dict[str, Any]:
+    """Command line entry point. See ``python benchmarks/packs.py --help``."""
+    from argparse import ArgumentParser
+
+    parser = ArgumentParser(prog="python benchmarks/packs.py", description="Benchmark PyToCP against synthetic content packs.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000], help="Entries per pack.")
+    parser.add_argument("--scenarios", nargs="+", choices=[*SCENARIOS], default=[*SCENARIOS], help="Scenarios to run.")
+    parser.add_argument("--out", help="Save the results to this json file.")
+    parser.add_argument("--compare", help="Compare against results saved with --out.")
+    args = parser.parse_args(argv)
+
+    results = {
+        "commit": _commit(),
+        "python": platform.python_version(),
+        "results": {}
+    }
+
+    ## the fake unpacked content is written once, outside every timed run ##
+    with TemporaryDirectory() as content:
+        if "eval" in args.scenarios:
+            _fake_content(content)
+
+        for scenario in args.scenarios:
+            for n in args.sizes:
+                result = run(scenario, n, content)
+                results["results"][f"{scenario}:{n}"] = result
+                output = "" if result["output_bytes"] is None else f" {result['output_bytes'] / 2**20:8.1f} MiB output"
+                print(
+                    f"{scenario:>6} {n:>7} entries: {result['seconds']:8.3f}s "
+                    f"{result['entries_per_second']:>11,.0f} entries/s "
+                    f"{result['peak_bytes'] / 2**20:8.1f} MiB peak{output}"
+                )
+
+    if args.out:
+        with open(args.out, "w") as file:
+            json.dump(results, file, indent=4)
+
+    if args.compare:
+        with open(args.compare) as file:
+            compare(results, json.load(file))
+
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Benchmarks how long a fresh process takes from importing pytocp to its first Entry.
+
+Each run starts a new interpreter, which imports pytocp, creates a Mod and one Entry. Short
+generator scripts and watch mode restarts pay this on every run.
+
+Usage:
+    python benchmarks/startup.py
+    python benchmarks/startup.py --runs 50 --out before.json
+    python benchmarks/startup.py --compare before.json
+"""
+
+from os.path import abspath, dirname, join
+from statistics import median
+from typing import Any
+import json
+import subprocess
+import sys
+
+SRC = join(dirname(abspath(__file__)), "..", "src")
+
+PROBE = """
+from time import perf_counter
+start = perf_counter()
+import sys
+sys.path.insert(0, {src!r})
+from pytocp import Mod, Entry
+imported = perf_counter()
+mod = Mod("Startup", "bench", "1.0.0", "Startup benchmark.", "bench.Startup")
+Entry("_First", {{"Value": 1}}, action="EditData", target="Data/Startup")
+done = perf_counter()
+print(imported - start, done - imported, len(sys.modules))
+"""
+"""Runs in every fresh interpreter; prints the import time, Mod plus Entry time and loaded module count."""
+
+
+def run(runs: int) -> dict[str, Any]:
+    """Starts ``runs`` fresh interpreters and returns the median timings."""
+    samples = []
+
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", PROBE.format(src=SRC)],
+            capture_output=True, text=True, check=True
+        ).stdout.split()
+        samples.append((float(output[0]), float(output[1]), int(output[2])))
+
+    return {
+        "runs": runs,
+        "import_seconds": median(sample[0] for sample in samples),
+        "first_entry_seconds": median(sample[1] for sample in samples),
+        "total_seconds": median(sample[0] + sample[1] for sample in samples),
+        "modules": samples[-1][2]
+    }
+
+
+def main(argv: list[str] = None) -> dict[str, Any]:
+    """Command line entry point. See ``python benchmarks/startup.py --help``."""
+    from argparse import ArgumentParser
+
+    parser = ArgumentParser(prog="python benchmarks/startup.py", description="Benchmark the time from importing pytocp to the first Entry.")
+    parser.add_argument("--runs", type=int, default=20, help="Fresh interpreters to start.")
+    parser.add_argument("--out", help="Save the results to this json file.")
+    parser.add_argument("--compare", help="Compare against results saved with --out.")
+    args = parser.parse_args(argv)
+
+    result = run(args.runs)
+    print(
+        f"import {result['import_seconds'] * 1000:.1f}ms, first Entry {result['first_entry_seconds'] * 1000:.1f}ms, "
+        f"total {result['total_seconds'] * 1000:.1f}ms ({result['modules']} modules loaded, median of {args.runs} runs)"
+    )
+
+    if args.out:
+        with open(args.out, "w") as file:
+            json.dump(result, file, indent=4)
+
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        print(f"Compared to baseline: total {result['total_seconds'] / baseline['total_seconds']:.2f}x")
+
+    return result
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,389 @@
+"""
+Asset helpers used by Mod.FetchImage and Mod.Create.
+
+Important contents:
+    (class) AssetStore
+
+    (class) Atlas
+
+    (class) Sprite
+
+    (function) read_png
+
+    (function) write_png
+"""
+
+from os import stat
+from hashlib import sha1
+from typing import NamedTuple
+import struct
+import zlib
+
+_CHUNK = 1 << 20
+"""Bytes read at a time while hashing a file."""
+
+
+class AssetStore:
+    """Content hashes of asset files, so every file is only read once while it is unchanged.
+
+    Hashes are cached by path and revalidated by modification time and size. Mod.FetchImage uses
+    them to deduplicate identical images, and Mod.Create uses them to skip assets whose compiled
+    copy already has the same contents.
+    """
+
+    def __init__(self):
+        self._digests: dict[str, tuple[int, int, str]] = {}
+        """Cached (modification time, size, digest) per file path."""
+        self.hashed = 0
+        """How many times a file was read and hashed."""
+
+    def digest(self, fp: str) -> "str|None":
+        """Returns the content hash of a file, reading it only if it changed since it was last hashed.
+
+        Args:
+            fp (str): Absolute file path.
+
+        Returns:
+            str|None: A hex digest of the file contents, or None if it can't be read.
+        """
+        try:
+            info = stat(fp)
+        except OSError:
+            self._digests.pop(fp, None)
+            return None
+
+        cached = self._digests.get(fp)
+        if not cached is None and cached[0] == info.st_mtime_ns and cached[1] == info.st_size:
+            return cached[2]
+
+        digest = sha1()
+        try:
+            with open(fp, "rb") as file:
+                while chunk := file.read(_CHUNK):
+                    digest.update(chunk)
+        except OSError:
+            return None
+
+        self.hashed += 1
+        self._digests[fp] = (info.st_mtime_ns, info.st_size, digest.hexdigest())
+        return digest.hexdigest()
+
+    def remember(self, fp: str, digest: str) -> None:
+        """Records the content hash of a file that was just written, so it isn't read back to hash it.
+
+        Args:
+            fp (str): Absolute file path.
+            digest (str): The hex digest of the contents written.
+        """
+        try:
+            info = stat(fp)
+        except OSError:
+            return
+
+        self._digests[fp] = (info.st_mtime_ns, info.st_size, digest)
+
+    def clear(self) -> None:
+        """Forgets every cached hash."""
+        self._digests.clear()
+
+
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+_PNG_CHANNELS = {0: 1, 2: 3, 3: 1, 4: 2, 6: 4}
+"""Samples per pixel for each PNG color type."""
+
+
+def png_size(fp: str) -> tuple[int, int]:
+    """Returns the width and height of a PNG image, reading only its header.
+
+    Raises:
+        ValueError: The file isn't a PNG image.
+    """
+    with open(fp, "rb") as file:
+        head = file.read(24)
+
+    if head[:8] != _PNG_SIGNATURE or head[12:16] != b"IHDR":
+        raise ValueError(f"{fp} is not a PNG image.")
+
+    return struct.unpack(">II", head[16:24])
+
+
+def _unfilter(data: bytes, height: int, stride: int, bpp: int) -> bytearray:
+    """Internal function. Reverses the per-row PNG filters of decompressed image data."""
+    out = bytearray(height * stride)
+    prev = bytearray(stride)
+    pos = 0
+
+    for y in range(height):
+        kind = data[pos]
+        row = bytearray(data[pos + 1:pos + 1 + stride])
+        pos += 1 + stride
+
+        if kind == 1:
+            for i in range(bpp, stride):
+                row[i] = (row[i] + row[i - bpp]) & 0xFF
+        elif kind == 2:
+            for i in range(stride):
+                row[i] = (row[i] + prev[i]) & 0xFF
+        elif kind == 3:
+            for i in range(stride):
+                row[i] = (row[i] + ((row[i - bpp] if i >= bpp else 0) + prev[i]) // 2) & 0xFF
+        elif kind == 4:
+            for i in range(stride):
+                a = row[i - bpp] if i >= bpp else 0
+                b = prev[i]
+                c = prev[i - bpp] if i >= bpp else 0
+                pa, pb, pc = abs(b - c), abs(a - c), abs(a + b - 2 * c)
+                row[i] = (row[i] + (a if pa <= pb and pa <= pc else b if pb <= pc else c)) & 0xFF
+        elif kind != 0:
+            raise ValueError(f"Unknown PNG filter type {kind}.")
+
+        out[y * stride:(y + 1) * stride] = row
+        prev = row
+
+    return out
+
+
+def read_png(fp: str) -> tuple[int, int, bytes]:
+    """Decodes a PNG image into 8 bit RGBA pixels.
+
+    Every non-interlaced color type and bit depth is supported. 16 bit samples are reduced to 8 bits.
+
+    Args:
+        fp (str): The PNG file.
+
+    Returns:
+        tuple[int, int, bytes]: The width, height and RGBA pixel data, row by row.
+
+    Raises:
+        ValueError: The file isn't a PNG image, or it is interlaced.
+    """
+    with open(fp, "rb") as file:
+        data = file.read()
+
+    if data[:8] != _PNG_SIGNATURE:
+        raise ValueError(f"{fp} is not a PNG image.")
+
+    header, palette, transparency, compressed = None, b"", None, []
+    pos = 8
+
+    while pos + 8 <= len(data):
+        length, kind = struct.unpack(">I4s", data[pos:pos + 8])
+        chunk = data[pos + 8:pos + 8 + length]
+        pos += 12 + length
+
+        if kind == b"IHDR":
+            header = struct.unpack(">IIBBBBB", chunk)
+        elif kind == b"PLTE":
+            palette = chunk
+        elif kind == b"tRNS":
+            transparency = chunk
+        elif kind == b"IDAT":
+            compressed.append(chunk)
+        elif kind == b"IEND":
+            break
+
+    if header is None:
+        raise ValueError(f"{fp} is not a PNG image.")
+
+    width, height, depth, color, _, _, interlace = header
+
+    if interlace:
+        raise ValueError(f"{fp} is interlaced, which isn't supported.")
+
+    channels = _PNG_CHANNELS[color]
+    stride = (width * channels * depth + 7) // 8
+    pixels = _unfilter(zlib.decompress(b"".join(compressed)), height, stride, max(1, channels * depth // 8))
+
+    ## reduce every sample to one byte ##
+    if depth == 16:
+        samples = pixels[::2]
+    elif depth < 8:
+        samples = bytearray()
+        per_byte, mask = 8 // depth, (1 << depth) - 1
+        for y in range(height):
+            row = pixels[y * stride:(y + 1) * stride]
+            samples += bytes(
+                (row[x // per_byte] >> (8 - depth * (x % per_byte + 1))) & mask
+                for x in range(width)
+            )
+    else:
+        samples = pixels
+
+    count = width * height
+    out = bytearray(count * 4)
+
+    if color == 6:
+        return width, height, bytes(samples)
+
+    if color == 3:
+        alphas = transparency or b""
+        lookup = [
+            palette[i * 3:i * 3 + 3] + bytes([alphas[i] if i < len(alphas) else 255])
+            for i in range(len(palette) // 3)
+        ]
+        return width, height, b"".join(lookup[i] for i in samples)
+
+    if color in (0, 4):
+        scale = 255 // ((1 << min(depth, 8)) - 1)
+        key = None
+        if color == 0 and transparency:
+            key = struct.unpack(">H", transparency[:2])[0]
+            key = key >> 8 if depth == 16 else key
+        for i in range(count):
+            gray = samples[i * channels]
+            out[i * 4:i * 4 + 3] = bytes((gray * scale,)) * 3
+            out[i * 4 + 3] = samples[i * 2 + 1] if color == 4 else (0 if gray == key else 255)
+        return width, height, bytes(out)
+
+    ## color == 2 ##
+    key = None
+    if transparency:
+        key = bytes(v >> 8 if depth == 16 else v for v in struct.unpack(">HHH", transparency[:6]))
+    for i in range(count):
+        rgb = samples[i * 3:i * 3 + 3]
+        out[i * 4:i * 4 + 3] = rgb
+        out[i * 4 + 3] = 0 if rgb == key else 255
+    return width, height, bytes(out)
+
+
+def write_png(width: int, height: int, rgba: bytes) -> bytes:
+    """Encodes 8 bit RGBA pixels as a PNG image.
+
+    Args:
+        width (int): Image width in pixels.
+        height (int): Image height in pixels.
+        rgba (bytes): The RGBA pixel data, row by row.
+
+    Returns:
+        bytes: The PNG file contents.
+    """
+    def chunk(kind: bytes, body: bytes) -> bytes:
+        return struct.pack(">I", len(body)) + kind + body + struct.pack(">I", zlib.crc32(kind + body))
+
+    stride = width * 4
+    raw = b"".join(b"\x00" + rgba[y * stride:(y + 1) * stride] for y in range(height))
+
+    return b"".join((
+        _PNG_SIGNATURE,
+        chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0)),
+        chunk(b"IDAT", zlib.compress(raw, 9)),
+        chunk(b"IEND", b"")
+    ))
+
+
+class Sprite(NamedTuple):
+    """Where a sprite fetched with Mod.FetchSprite ends up: use these as an item's Texture and SpriteIndex."""
+
+    texture: str
+    """The Content Patcher target of the tilesheet holding the sprite."""
+    index: int
+    """The sprite's index within the tilesheet."""
+
+
+class Atlas:
+    """Packs same-sized sprites into as few tilesheets as possible (see: Mod.FetchSprite).
+
+    Sprites are laid out on a fixed grid, left to right and top to bottom, which is how the game
+    counts sprite indexes. A tilesheet holds up to ``columns`` times ``MAX_SIZE // tile_height``
+    sprites; more sprites start a new tilesheet. Identical sprites share one tile.
+
+    Args:
+        tile_width (int): Tile width in pixels.
+        tile_height (int): Tile height in pixels.
+        columns (int, optional): Tiles per row. Defaults to 16.
+    """
+
+    MAX_SIZE = 4096
+    """The largest tilesheet height in pixels."""
+
+    def __init__(self, tile_width: int, tile_height: int, columns: int = 16):
+        self.tile_width = tile_width
+        self.tile_height = tile_height
+        self.columns = columns
+        self.name = f"atlas-{tile_width}x{tile_height}"
+
+        self.sprites: list[str] = []
+        """Source file paths, in tile order."""
+        self.digests: list["str|None"] = []
+        """Content hash of each sprite, in tile order."""
+        self._tiles: dict[str, int] = {}
+        """Tile of each sprite, by content hash (or source path, if it couldn't be hashed)."""
+
+    @property
+    def per_sheet(self) -> int:
+        """How many sprites fit in one tilesheet."""
+        return self.columns * max(1, self.MAX_SIZE // self.tile_height)
+
+    def relpath(self, sheet: int) -> str:
+        """The path of a tilesheet within the mod."""
+        return f"assets/{self.name}-{sheet}.png"
+
+    def target(self, sheet: int) -> str:
+        """The Content Patcher target a tilesheet is loaded to."""
+        return "{{ModID}}/" + f"{self.name}-{sheet}"
+
+    def add(self, src: str, digest: "str|None") -> Sprite:
+        """Adds a sprite, unless an identical one was already added.
+
+        Args:
+            src (str): The sprite's source file path.
+            digest (str|None): The sprite's content hash (see: AssetStore.digest).
+
+        Returns:
+            Sprite: The sprite's tilesheet and index.
+        """
+        key = digest or src
+        tile = self._tiles.get(key)
+
+        if tile is None:
+            tile = len(self.sprites)
+            self._tiles[key] = tile
+            self.sprites.append(src)
+            self.digests.append(digest)
+
+        return Sprite(self.target(tile // self.per_sheet), tile % self.per_sheet)
+
+    def sheets(self) -> list[tuple[int, int]]:
+        """Returns the first and last tile (exclusive) of every tilesheet."""
+        return [
+            (start, min(start + self.per_sheet, len(self.sprites)))
+            for start in range(0, len(self.sprites), self.per_sheet)
+        ]
+
+    def fingerprint(self, sheet: int) -> "str|None":
+        """Returns a fingerprint of a tilesheet's layout and sprite contents, or None if a sprite couldn't be hashed."""
+        start, end = self.sheets()[sheet]
+        digests = self.digests[start:end]
+
+        if None in digests:
+            return None
+
+        return sha1(f"{self.name}:{self.columns}:{','.join(digests)}".encode("utf-8")).hexdigest()
+
+    def compose(self, sheet: int) -> bytes:
+        """Draws a tilesheet and returns it as PNG file contents.
+
+        Sprites smaller than the tile are drawn in its top left corner.
+
+        Raises:
+            ValueError: A sprite is larger than the tile, or isn't a PNG image.
+        """
+        start, end = self.sheets()[sheet]
+        tw, th = self.tile_width, self.tile_height
+        width = self.columns * tw
+        height = ((end - start + self.columns - 1) // self.columns) * th
+        canvas = bytearray(width * height * 4)
+
+        for tile, src in enumerate(self.sprites[start:end]):
+            w, h, pixels = read_png(src)
+
+            if w > tw or h > th:
+                raise ValueError(f"{src} is {w}x{h}, larger than the {tw}x{th} tiles of its atlas.")
+
+            x, y = (tile % self.columns) * tw, (tile // self.columns) * th
+
+            for row in range(h):
+                offset = ((y + row) * width + x) * 4
+                canvas[offset:offset + w * 4] = pixels[row * w * 4:(row + 1) * w * 4]
+
+        return write_png(width, height, bytes(canvas))
@@ -1,4 +1,5 @@
 from os.path import join
+from collections.abc import Mapping
 import json
 
 
@@ -16,4 +17,120 @@ def dict_tree(keys: list[str], cur_dict: dict = {}):
 	if len(keys) == 1:
 		return {keys[0] : cur_dict}
 	
-	return dict_tree(keys[:-1], {keys[-1] : cur_dict})
\ No newline at end of file
+	return dict_tree(keys[:-1], {keys[-1] : cur_dict})
+
+
+class LayeredDict(dict):
+	"""A dict of the keys in ``layer`` over a copy of ``template``, sharing the template's nested values until they are used.
+
+	Only the top level of the template is copied up front. A nested list or dict that still
+	comes from the template is copied the first time it is read through this dict (e.g.
+	``entry["ContextTags"]``, ``get``, ``values`` or ``items``), so changing it never changes the
+	template or other dicts made from it. Encoders read the shared values in place (see: flatten).
+
+	Args:
+		layer (Mapping, optional): The overriding keys.
+		template (dict, optional): The shared template.
+	"""
+
+	__slots__ = ("_template",)
+
+	def __init__(self, layer: Mapping = (), template: dict = None):
+		super().__init__(() if template is None else dict.items(template))
+		dict.update(self, layer)
+		self._template = template
+
+	def __getitem__(self, key):
+		value = dict.__getitem__(self, key)
+
+		if isinstance(value, (list, dict)) and not self._template is None and value is dict.get(self._template, key):
+			from copy import deepcopy
+			value = deepcopy(value)
+			dict.__setitem__(self, key, value)
+
+		return value
+
+	def __iter__(self):
+		## overriding __iter__ makes dict(), {**d} and update() copy through __getitem__ ##
+		return dict.__iter__(self)
+
+	def get(self, key, default=None):
+		return self[key] if key in self else default
+
+	def setdefault(self, key, default=None):
+		if key in self:
+			return self[key]
+
+		self[key] = default
+		return default
+
+	def pop(self, key, *default):
+		## a value handed out is the caller's, so copy it off the template first ##
+		if key in self:
+			self[key]
+
+		return dict.pop(self, key, *default)
+
+	def popitem(self):
+		if len(self) > 0:
+			self[next(reversed(dict.keys(self)))]
+
+		return dict.popitem(self)
+
+	def values(self):
+		self._own_all()
+		return dict.values(self)
+
+	def items(self):
+		self._own_all()
+		return dict.items(self)
+
+	def _own_all(self) -> None:
+		"""Internal method. Copies every nested value still shared with the template."""
+		for key in [*dict.keys(self)]:
+			self[key]
+
+	def copy(self) -> "LayeredDict":
+		new = LayeredDict()
+		dict.update(new, dict.items(self))
+		new._template = self._template
+		return new
+
+	__copy__ = copy
+
+	def __deepcopy__(self, memo: dict) -> dict:
+		from copy import deepcopy
+		return deepcopy(dict(dict.items(self)), memo)
+
+	def __reduce__(self):
+		return (dict, (flatten(self),))
+
+	def __or__(self, other):
+		if not isinstance(other, dict):
+			return NotImplemented
+
+		new = self.copy()
+		new.update(other)
+		return new
+
+	def __ior__(self, other):
+		self.update(other)
+		return self
+
+
+def flatten(value):
+	"""Returns ``value`` with LayeredDicts turned into plain dicts that share their nested values, for encoders that only read it."""
+	if isinstance(value, LayeredDict):
+		return {key: flatten(item) for key, item in dict.items(value)}
+	return value
+
+
+def json_default(value):
+	"""``default`` hook for json encoders. Turns mappings that aren't dicts into dicts at serialization.
+
+	Raises:
+		TypeError: The value is not json serializable.
+	"""
+	if isinstance(value, Mapping):
+		return dict(value)
+	raise TypeError(f"Object of type {value.__class__.__name__} is not JSON serializable")
\ No newline at end of file
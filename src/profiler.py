@@ -0,0 +1,98 @@
+"""
+Build instrumentation used by Mod.PROFILE.
+
+Important contents:
+    (class) Profiler
+"""
+
+from contextlib import contextmanager
+from time import perf_counter
+from typing import Any, Iterator
+
+
+class Profiler:
+    """Accumulates where the time of one build goes (see: Mod.PROFILE).
+
+    A build runs from the Mod's creation (or the previous Mod.Create) to the end of Mod.Create.
+    Phases are timed inclusively: "entry" includes the "hash_entry" and "merge" work done while
+    constructing and registering entries.
+
+    Phases:
+        entry: Entry construction, including auto registration.
+        hash_entry: Hashing entries into patch keys.
+        merge: Registering entries with the mod, and merging curried entry templates.
+        eval_entry: Loading unpacked content for eval_entry and eval_entries.
+        changes: Collecting the output documents in Mod.Create.
+        serialize: Encoding output files. Changes are generated while encoding, so this includes building them.
+        write: Staging, syncing and committing output files.
+    """
+
+    PHASES = ("entry", "hash_entry", "merge", "eval_entry", "changes", "serialize", "write")
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        """Starts a new build, discarding everything recorded so far."""
+        self.start = perf_counter()
+        """When the build started."""
+        self.timings: dict[str, float] = dict.fromkeys(self.PHASES, 0.0)
+        """Seconds spent per phase."""
+        self.calls: dict[str, int] = dict.fromkeys(self.PHASES, 0)
+        """Times each phase ran."""
+        self.counts: dict[str, int] = {}
+        """Counters, such as entries and patches."""
+        self.bytes_written: dict[str, int] = {}
+        """Bytes written per output file, by path within the mod."""
+
+    def add(self, phase: str, seconds: float, calls: int = 1) -> None:
+        """Records time spent in a phase.
+
+        Args:
+            phase (str): The phase name.
+            seconds (float): Time spent.
+            calls (int, optional): How many runs of the phase the time covers. Defaults to 1.
+        """
+        self.timings[phase] = self.timings.get(phase, 0.0) + seconds
+        self.calls[phase] = self.calls.get(phase, 0) + calls
+
+    @contextmanager
+    def phase(self, phase: str) -> Iterator[None]:
+        """Times the body of a ``with`` block as one run of ``phase``."""
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.add(phase, perf_counter() - start)
+
+    def count(self, name: str, n: int = 1) -> None:
+        """Adds ``n`` to the counter ``name``."""
+        self.counts[name] = self.counts.get(name, 0) + n
+
+    def wrote(self, relpath: str, nbytes: int) -> None:
+        """Records the size of an output file that was written."""
+        self.bytes_written[relpath] = nbytes
+
+    def report(self) -> dict[str, Any]:
+        """Returns the build's profile as a json serializable dict.
+
+        Returns:
+            dict[str, Any]: "total" seconds, plus the "timings", "calls", "counts" and "bytes_written" dicts.
+        """
+        return {
+            "total": perf_counter() - self.start,
+            "timings": dict(self.timings),
+            "calls": dict(self.calls),
+            "counts": dict(self.counts),
+            "bytes_written": dict(self.bytes_written)
+        }
+
+    @staticmethod
+    def summary(report: dict[str, Any]) -> str:
+        """Returns a short, human readable summary of a profile report (see: Profiler.report)."""
+        timings = ", ".join(
+            f"{phase} {seconds * 1000:.1f}ms"
+            for phase, seconds in report["timings"].items()
+            if report["calls"].get(phase)
+        )
+        return f"Built in {report['total']:.3f}s ({timings}); {sum(report['bytes_written'].values())} bytes written."
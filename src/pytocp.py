@@ -7,34 +7,105 @@ Important contents:
     (class) Entry
 
     (class) ContentFile
+
+    (class) PatchKey
     
     (function) Entry_Curry
 
-    (global Mod) _MOD
+    (function) current_mod
 """
 
-from os.path import abspath, join, basename, split
-from os import mkdir, chdir
-from typing import Any
-from shutil import rmtree, copyfile
-from copy import deepcopy
-from inspect import stack
-from requests import get
-from helper import rec_trav, dict_tree
+from os.path import abspath, join, basename, split, splitext, getsize
+from os import mkdir, sep, remove
+from typing import Any, Callable, Iterable, Iterator, NamedTuple
+from hashlib import sha1
+from collections.abc import Mapping, MutableMapping
+from helper import dict_tree, LayeredDict
+from unpacked import ContentCache, ContentIndex
+from runner import watch, watching, batching
+from smapi import ReloadClient
+from assets import AssetStore, Atlas, Sprite, png_size
+from writer import BuildReport, BuildManifest, FanOutWriter, fingerprint, JsonEncoder, Stream, BUILD_MANIFEST_NAME
+from itertools import chain
 from time import perf_counter
-import re
+from contextvars import ContextVar
+from profiler import Profiler
+from sharding import ShardPolicy, Shard
 import json
+import sys
 
 JsonTypes = type["str|int|list[Any]|dict[Any]"]
 """Types that json supports."""
 EntryDict = type["dict[str, list[JsonTypes]]"]
 """Type for the Entry Content Patcher field."""
 
-_MOD = None
-"""Internally used global mod instance. Overriden on every new mod object initialization."""
+_CURRENT_MOD: "ContextVar[Mod|None]" = ContextVar("pytocp_current_mod", default=None)
+"""The Mod being built in the current context. Set by every new Mod, and while a Mod is entered with ``with``."""
+_LAST_MOD: "Mod|None" = None
+"""The last Mod created in the process. Current in contexts that haven't created or entered a Mod themselves, e.g. new threads."""
+_ENTERED: "ContextVar[tuple[Mod|None, ...]]" = ContextVar("pytocp_entered_mods", default=())
+"""The mods that were current before each ``with mod:`` block of the current context, innermost last."""
+
+
+def current_mod() -> "Mod":
+    """Returns the Mod being built in the current context: the one entered with ``with``, otherwise the last one created in this context.
+
+    Each thread (and asyncio task) has its own context, so mods built concurrently don't see each
+    other. A context that hasn't created or entered a Mod, e.g. a thread started by the script,
+    builds the last Mod created in the process.
+
+    Raises:
+        RuntimeError: No Mod was created yet.
+    """
+    mod = _CURRENT_MOD.get() or _LAST_MOD
+
+    if mod is None:
+        raise RuntimeError("No Mod is being built here. Create a Mod, or enter one with \"with mod:\", first.")
+
+    return mod
+
+
+def __getattr__(name: str) -> Any:
+    ## backwards compatibility: pytocp._MOD used to be a module global ##
+    if name == "_MOD":
+        return _CURRENT_MOD.get() or _LAST_MOD
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+_CONTENT_CACHE = ContentCache()
+"""The process wide cache of parsed unpacked content files. Entries are revalidated by modification time, so it stays warm across rebuilds."""
+
+_ASSET_STORE = AssetStore()
+"""The process wide cache of asset content hashes, so unchanged assets are only read once."""
+
+_RELOAD_CLIENT = ReloadClient()
+"""The process wide SMAPI reload client, so its connection is reused across rebuilds."""
+
+
+class PatchKey(NamedTuple):
+    """The routing fields that identify one Content Patcher patch.
+
+    Entries with equal keys are written as one change. Keys are plain tuples of strings, so
+    they compare equal across processes and can be pickled, cached and diffed; use
+    PatchKey.digest for a stable string form.
+    """
+
+    action: str
+    target: str
+    targetfield: "tuple[str, ...]"
+    fromfile: str
+    priority: str
+
+    def digest(self) -> str:
+        """Returns a stable hex digest of the key, identical in every process."""
+        return sha1(json.dumps(self).encode("utf-8")).hexdigest()
+
+
+_PATCH_KEYS: dict[PatchKey, PatchKey] = {}
+"""Interned patch keys, so entries of the same patch share one key object."""
 
 
-def _hash_entry(action: str, target: str, targetfield: list, fromfile: str, priority: str) -> int:
+def _hash_entry(action: str, target: str, targetfield: list, fromfile: str, priority: str) -> PatchKey:
     """Internal function.
 
     Args:
@@ -45,8 +116,12 @@ def _hash_entry(action: str, target: str, targetfield: list, fromfile: str, prio
         priority (str): Priority value for entry.
 
     Returns:
-        int: A hash value for the entry target data.
+        PatchKey: The interned key for the entry target data.
     """
+    mod = current_mod()
+    profile = mod.PROFILE
+    if profile: start = perf_counter()
+
     def else_to_string(value: "str|list|None"):
         """Internal method
         """
@@ -57,15 +132,16 @@ def _hash_entry(action: str, target: str, targetfield: list, fromfile: str, prio
         if value is None:
             return ""
     
-    this_hash = hash("".join([*map(else_to_string, [action, target, targetfield, fromfile])]))
-
-    _MOD._hash_lookup[this_hash] = {
-        "Action": action,
-        "Target": else_to_string(target),
-        "TargetField": targetfield,
-        "FromFile": else_to_string(fromfile),
-        "Priority": priority
-    }
+    this_hash = PatchKey(
+        else_to_string(action),
+        else_to_string(target),
+        tuple(targetfield or ()),
+        else_to_string(fromfile),
+        else_to_string(priority)
+    )
+    this_hash = _PATCH_KEYS.setdefault(this_hash, this_hash)
+
+    if profile: mod.profiler.add("hash_entry", perf_counter() - start)
 
     return this_hash
 
@@ -73,30 +149,76 @@ def _hash_entry(action: str, target: str, targetfield: list, fromfile: str, prio
 _new_replace = lambda x, y : y if y else x
 
 
+def _target_fp(target: str) -> "str|None":
+    """Internal function. Resolves a Content Patcher target to its file in the unpacked content folder.
+
+    When the unpacked content is indexed (see: Mod.IndexContent), the index answers without
+    touching the disk.
+
+    Args:
+        target (str): The target, e.g. "Data/Objects".
+
+    Returns:
+        str|None: The path of the target's json file, or None if the index has no such asset.
+    """
+    mod = current_mod()
+
+    if not mod.content_index is None:
+        return mod.content_index.resolve(target)
+
+    directory = target.replace("\\", "/").split("/")
+
+    return join(mod.unpacked_content_fp, *directory[:-1], directory[-1] + ".json")
+
+
 def eval_entry(entry):
-    if _MOD.unpacked_content_fp is None:
+    """Evaluates an EditData entry against the unpacked game content (see: Mod.unpacked_content_fp).
+
+    The target data file is loaded through Mod.content_cache, so repeated evaluations against
+    the same target only parse it once.
+
+    Args:
+        entry (Entry): The entry to evaluate.
+
+    Returns:
+        Any: The patched data at the entry's target field, or None if it couldn't be evaluated.
+    """
+    from copy import copy
+
+    mod = current_mod()
+
+    if mod.unpacked_content_fp is None:
         return
     
     if not entry.action == "EditData":
         return
     
-    directory = re.split(r"\\|/", entry.target)
-    
-    fp = join(_MOD.unpacked_content_fp, *directory[:-1], directory[-1] + ".json")
+    fp = _target_fp(entry.target)
+
+    if fp is None:
+        print(f'Could not find data file for target "{entry.target}".')
+        return
 	
     try:
-        file = json.load(open(fp, "r"))
+        ## large files only have the targeted subtree decoded (see: ContentCache.stream_threshold) ##
+        if mod.PROFILE: start = perf_counter()
+        base_dict = mod.content_cache.load(fp, entry.targetfield)
+        if mod.PROFILE: mod.profiler.add("eval_entry", perf_counter() - start)
     except FileNotFoundError:
-        print(f'Could not find data file {directory[-1] + ".json"}.')
+        print(f'Could not find data file {basename(fp)}.')
+        return
+    except (KeyError, TypeError):
+        print(f"Could not find target field {'/'.join(entry.targetfield)} in {basename(fp)}.")
         return
     except:
         print(f"An unknown error occurred when finding data file.")
         return
 	
-    if isinstance(file, list):
+    if isinstance(base_dict, list):
         return entry.entry
 	
-    base_dict = rec_trav(file, entry.targetfield)
+    ## the loaded data is shared through the cache, so patch a copy ##
+    base_dict = copy(base_dict)
 	
     base_dict[entry.entry_id] = entry.entry
 	
@@ -106,31 +228,147 @@ def eval_entry(entry):
         return dict_tree(entry.targetfield, base_dict)
     
 
+def _apply_entry(data: "dict|list", entry) -> None:
+    """Internal function. Applies one EditData entry to ``data`` in place, like Content Patcher would.
+
+    A ``None`` entry removes the key. In list data, the item whose "Id" matches the entry id is
+    replaced (or removed), otherwise the entry is appended.
+
+    Args:
+        data (dict | list): The data at the entry's target field.
+        entry (Entry): The entry to apply.
+    """
+    if isinstance(data, MutableMapping):
+        if entry.entry is None:
+            data.pop(entry.entry_id, None)
+        else:
+            data[entry.entry_id] = entry.entry
+        return
+
+    for index, item in enumerate(data):
+        if isinstance(item, dict) and item.get("Id") == entry.entry_id:
+            if entry.entry is None:
+                data.pop(index)
+            else:
+                data[index] = entry.entry
+            return
+
+    if not entry.entry is None:
+        data.append(entry.entry)
+
+
+def eval_entries(entries: "Iterable[Entry]") -> dict[str, Any]:
+    """Evaluates many EditData entries against the unpacked game content in one pass (see: Mod.unpacked_content_fp).
+
+    Entries are grouped by target and target field; every target data file is loaded once and
+    every entry applied to it. Only the containers along each target field are copied, so the
+    cached data is never mutated.
+
+    Args:
+        entries (Iterable[Entry]): The entries to evaluate. Entries with other actions are ignored.
+
+    Returns:
+        dict[str, Any]: The patched data for each target, keyed by target.
+    """
+    from copy import copy
+
+    mod = current_mod()
+
+    if mod.unpacked_content_fp is None:
+        return {}
+
+    groups: dict[str, dict[tuple[str], list[Entry]]] = {}
+
+    for entry in entries:
+        if not entry.action == "EditData":
+            continue
+
+        groups.setdefault(entry.target, {})\
+            .setdefault(tuple(entry.targetfield or []), [])\
+            .append(entry)
+
+    results = {}
+
+    for target, fields in groups.items():
+        fp = _target_fp(target)
+
+        if fp is None:
+            print(f'Could not find data file for target "{target}".')
+            continue
+
+        try:
+            if mod.PROFILE: start = perf_counter()
+            data = copy(mod.content_cache.load(fp))
+            if mod.PROFILE: mod.profiler.add("eval_entry", perf_counter() - start)
+        except FileNotFoundError:
+            print(f'Could not find data file {basename(fp)}.')
+            continue
+        except:
+            print(f"An unknown error occurred when finding data file.")
+            continue
+
+        for targetfield, field_entries in fields.items():
+            node = data
+
+            try:
+                for key in targetfield:
+                    node[key] = copy(node[key])
+                    node = node[key]
+            except (KeyError, IndexError, TypeError):
+                print(f"Could not find target field {'/'.join(targetfield)} in {basename(fp)}.")
+                continue
+
+            for entry in field_entries:
+                _apply_entry(node, entry)
+
+        results[target] = data
+
+    return results
+
+
 def _adv_dict_merge(dict1, dict2):
-    dict1 = deepcopy(dict1)
-    
+    """Internal function. Merges an Entry_Curry override (``dict2``) onto its template (``dict1``).
+
+    Scalars in the override replace the template value, lists are concatenated and dicts are
+    merged. The template isn't deep copied: the result is a LayeredDict, which copies the
+    template's nested values only once they are used, so the cost of a curried entry scales
+    with its override.
+
+    Args:
+        dict1 (Any): The curried template entry.
+        dict2 (Any): The override passed to the curried factory.
+
+    Returns:
+        Any: The merged entry.
+    """
+    from copy import deepcopy
+
     if not isinstance(dict1, dict) or not isinstance(dict2, dict):
-        return _new_replace(dict2, dict1)
+        return _new_replace(dict2, deepcopy(dict1))
+
+    layer = {}
 
     for key in dict2:
         if isinstance(dict2[key], str) or isinstance(dict2[key], int) or isinstance(dict2[key], float):
-            dict1[key] = dict2[key]
+            layer[key] = dict2[key]
 
         elif isinstance(dict2[key], list):
             if not key in dict1:
-                dict1[key] = dict2[key]
+                layer[key] = dict2[key]
                 continue
 
-            dict1[key] = dict1[key] + dict2[key]
+            layer[key] = deepcopy(dict.__getitem__(dict1, key)) + dict2[key]
 
         elif isinstance(dict2[key], dict):
             if not key in dict1:
-                dict1[key] = dict2[key]
+                layer[key] = dict2[key]
                 continue
 
-            dict1[key] = dict1[key] | dict2[key]
+            ## read the template in place; a LayeredDict template would copy the value first ##
+            base = dict.__getitem__(dict1, key)
+            layer[key] = LayeredDict(dict2[key], base) if isinstance(base, dict) else base | dict2[key]
 
-    return dict1
+    return LayeredDict(layer, dict1)
 
 
 class Entry:
@@ -144,19 +382,22 @@ class Entry:
         targetfield (list[str], optional): The field to target within the ``target`` data; a path in list format. Defaults to None.
         fromfile (str | list[str], optional): The file to be recognized by Content Patcher. Defaults to None.
         priority (str, optional): How important this entry is. Defaults to None.
-        moveentries (list[dict[str, JsonTypes]], optional): Describes how to move entries in the data. Defaults to None.
+        moveentries (list[dict[str, JsonTypes]], optional): Describes how to move entries in the data. Defaults to no MoveEntries.
     """
 
+    __slots__ = ("entry_id", "entry", "hash", "moveentries", "file")
+    """Entries only store their own data. The routing fields live in the interned, shared PatchKey (see: Entry.hash)."""
+
     def __init__(
             self,
             entry_id: str = "",
             entry: "EntryDict|JsonTypes" = None,
             action: str = None,
             target: "str|list[str]" = None,
-            targetfield: list[str] = [],
+            targetfield: list[str] = None,
             fromfile: "str|list[str]" = None,
             priority: str = None,
-            moveentries: list[dict[str, JsonTypes]] = []
+            moveentries: list[dict[str, JsonTypes]] = ()
         ):
         """A Content Patcher entry, represented as a Python object.
 
@@ -168,38 +409,142 @@ class Entry:
             targetfield (list[str], optional): The field to target within the ``target`` data; a path in list format. Defaults to None.
             fromfile (str | list[str], optional): The file to be recognized by Content Patcher. Defaults to None.
             priority (str, optional): How important this entry is. Defaults to None.
-            moveentries (list[dict[str, JsonTypes]], optional): Describes how to move entries in the data. Defaults to None.
+            moveentries (list[dict[str, JsonTypes]], optional): Describes how to move entries in the data. Defaults to no MoveEntries.
         """
+        mod = current_mod()
+        profile = mod.PROFILE
+        if profile: start = perf_counter()
 
         self.entry_id = entry_id
 
-        if _MOD.PREFIX_WITH_MODID:
+        if mod.PREFIX_WITH_MODID:
             self.entry_id = "{{ModID}}" + entry_id
 
-        self.action = action
-        self.targetfield = targetfield
         self.entry = entry
-        self.priority = priority
         self.moveentries = moveentries
-        
         self.file = ""
+        self.hash = _hash_entry(action, target, targetfield, fromfile, priority)
 
-        self.file = ""
+        if mod.AUTO_REGISTER:
+            mod.Register(self)
+
+        if profile: mod.profiler.add("entry", perf_counter() - start)
+
+    def _rekey(self, **fields: Any) -> None:
+        """Internal method. Replaces routing fields by re-hashing the entry's patch key."""
+        key = self.hash._replace(**fields)
+        self.hash = _PATCH_KEYS.setdefault(key, key)
+
+    @property
+    def action(self) -> "str|None":
+        """The action key for the entry."""
+        return self.hash.action or None
+
+    @action.setter
+    def action(self, value: "str|None") -> None:
+        self._rekey(action=value or "")
+
+    @property
+    def target(self) -> "str|None":
+        """The data to target, with multiple targets joined by ", "."""
+        return self.hash.target or None
+
+    @target.setter
+    def target(self, value: "str|list[str]|None") -> None:
+        self._rekey(target=", ".join(value) if isinstance(value, list) else value or "")
+
+    @property
+    def targetfield(self) -> list[str]:
+        """The field to target within the target data; a path in list format."""
+        return [*self.hash.targetfield]
+
+    @targetfield.setter
+    def targetfield(self, value: "list[str]|None") -> None:
+        self._rekey(targetfield=tuple(value or ()))
+
+    @property
+    def fromfile(self) -> "str|None":
+        """The file to be recognized by Content Patcher, with multiple files joined by ", "."""
+        return self.hash.fromfile or None
+
+    @fromfile.setter
+    def fromfile(self, value: "str|list[str]|None") -> None:
+        self._rekey(fromfile=", ".join(value) if isinstance(value, list) else value or "")
+
+    @property
+    def priority(self) -> "str|None":
+        """How important this entry is."""
+        return self.hash.priority or None
+
+    @priority.setter
+    def priority(self, value: "str|None") -> None:
+        self._rekey(priority=value or "")
+
+    @classmethod
+    def from_records(
+            cls,
+            records: "Mapping[str, EntryDict|JsonTypes]|Iterable[tuple[str, EntryDict|JsonTypes]]" = (),
+            action: str = None,
+            target: "str|list[str]" = None,
+            targetfield: list[str] = None,
+            fromfile: "str|list[str]" = None,
+            priority: str = None,
+            entry_ids: "Iterable[str]" = None,
+            entries: "Iterable[EntryDict|JsonTypes]" = None,
+            register_with: "ContentFile" = None
+        ) -> "list[Entry]":
+        """Builds many entries that share an action, target, target field, fromfile and priority.
 
-        if isinstance(target, list):
-            self.target = ", ".join(target)
-        else:
-            self.target = target
+        The patch is hashed once for the whole group, and the entries are registered in one
+        operation (see: Mod.RegisterMany), with ``register_with`` if given, otherwise with the
+        mod when Mod.AUTO_REGISTER is set.
 
-        if isinstance(fromfile, list):
-            self.fromfile = ", ".join(fromfile)
-        else:
-            self.fromfile = fromfile
+        Args:
+            records (Mapping[str, EntryDict | Any] | Iterable[tuple[str, EntryDict | Any]], optional): Entry ids mapped to entry data, or (entry_id, entry) pairs.
+            action (str, optional): The action key shared by the entries. Defaults to None.
+            target (str | list[str], optional): The data to target. Defaults to None.
+            targetfield (list[str], optional): The field to target within the ``target`` data. Defaults to None.
+            fromfile (str | list[str], optional): The file to be recognized by Content Patcher. Defaults to None.
+            priority (str, optional): How important these entries are. Defaults to None.
+            entry_ids (Iterable[str], optional): Column of entry ids, used with ``entries`` instead of ``records``. Defaults to None.
+            entries (Iterable[EntryDict | Any], optional): Column of entry data, matching ``entry_ids``. Defaults to None.
+            register_with (ContentFile, optional): A ContentFile to register the entries with instead of the mod. Defaults to None.
 
-        self.hash = _hash_entry(action, target, targetfield, fromfile, priority)
+        Returns:
+            list[Entry]: The new entries, in record order.
+        """
+        mod = current_mod()
+        profile = mod.PROFILE
+        if profile: start = perf_counter()
+
+        if not entry_ids is None:
+            records = zip(entry_ids, entries)
+        elif isinstance(records, Mapping):
+            records = records.items()
+
+        entry_hash = _hash_entry(action, target, targetfield, fromfile, priority)
+
+        prefix = "{{ModID}}" if mod.PREFIX_WITH_MODID else ""
+
+        out = []
 
-        if _MOD.AUTO_REGISTER:
-            _MOD.Register(self)
+        for entry_id, entry in records:
+            this = cls.__new__(cls)
+            this.entry_id = prefix + entry_id
+            this.entry = entry
+            this.moveentries = ()
+            this.file = ""
+            this.hash = entry_hash
+            out.append(this)
+
+        if not register_with is None:
+            register_with.Register(*out)
+        elif mod.AUTO_REGISTER:
+            mod.RegisterMany(out)
+
+        if profile: mod.profiler.add("entry", perf_counter() - start, len(out))
+
+        return out
 
 
 class ContentFile:
@@ -209,8 +554,9 @@ class ContentFile:
         self.moveentries = {}
         self.Register(*entries)
 
-        if _MOD.AUTO_REGISTER:
-            _MOD.RegisterContentFile(self)
+        mod = current_mod()
+        if mod.AUTO_REGISTER:
+            mod.RegisterContentFile(self)
 
     def Register(self, *entries: Entry):
         for entry in entries:
@@ -229,10 +575,10 @@ def Entry_Curry(
         entry: EntryDict = {},
         action: str = None,
         target: "str|list[str]" = None,
-        targetfield: list[str] = [],
+        targetfield: list[str] = None,
         fromfile: "str|list[str]" = None,
         priority: str = None,
-        moveentries: list[dict[str, JsonTypes]] = [],
+        moveentries: list[dict[str, JsonTypes]] = (),
         to_curry: Any = Entry,
         register_with: ContentFile = None
     ):
@@ -254,16 +600,22 @@ def Entry_Curry(
             targetfield: list[str] = None,
             fromfile: "str|list[str]" = None,
             priority: str = None,
-            moveentries: list[dict[str, JsonTypes]] = []
+            moveentries: list[dict[str, JsonTypes]] = ()
         ) -> "Entry|Any":
 
+        mod = current_mod()
+
         if not register_with is None:
-            prev_Register = deepcopy(_MOD.AUTO_REGISTER)
-            _MOD.AUTO_REGISTER = False
+            prev_Register = mod.AUTO_REGISTER
+            mod.AUTO_REGISTER = False
+
+        if mod.PROFILE: start = perf_counter()
+        merged = _adv_dict_merge(c_entry, entry)
+        if mod.PROFILE: mod.profiler.add("merge", perf_counter() - start)
 
         out = to_curry(
             entry_id = _new_replace(entry_id, c_entry_id),
-            entry = _adv_dict_merge(c_entry, entry),
+            entry = merged,
             action = _new_replace(action, c_action),
             target = _new_replace(target, c_target),
             targetfield = _new_replace(targetfield, c_targetfield),
@@ -274,26 +626,46 @@ def Entry_Curry(
         
         if not register_with is None:
             register_with.Register(out)
-            _MOD.AUTO_REGISTER = prev_Register
+            mod.AUTO_REGISTER = prev_Register
             
         return out
 
     return _curried_entry
 
 
-def reload_SMAPI():
+def reload_SMAPI() -> bool:
     ## only if WebServerCommands is installed and enabled. ##
     
-    WebServerCommandsURL = "http://127.0.0.1:56802/execute"
-    
-    get(WebServerCommandsURL + f"?command=patch reload {_MOD.manifest['UniqueId']}")
+    mod = current_mod()
+    return mod.reload_client.reload(mod.manifest['UniqueId'])
 
 
 def log(*string: tuple[str]):
-    _MOD._log_file += "\n".join(string) + "\n"*2
+    mod = current_mod()
+    mod._log_file += "\n".join(string) + "\n"*2
 
 
 class Mod:
+    _extra: "dict[str, Callable[[Any], Any]]" = {
+        "unpacked_content_fp": 
+        lambda v : abspath(v),
+        "output_fp":
+        lambda v : [abspath(x) for x in v] if v != [""] else [abspath("")]
+    }
+    """Internal dict for Mod.__setattr__. Normalizes file path attributes when they are set."""
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        """Internal method. Applies Mod._extra before setting an attribute.
+
+        Args:
+            name (str): Attribute name
+            value (Any): Attribute value
+        """
+        if name in Mod._extra and value:
+            value = Mod._extra[name](value)
+
+        object.__setattr__(self, name, value)
+
     def __init__(
         self,
         name: str,
@@ -306,40 +678,8 @@ class Mod:
         contentpack_for: str = "Pathoschild.ContentPatcher",
         dependencies: list[dict[str, str]] = None
         ):
+        global _LAST_MOD
 
-        self._start = perf_counter()
-
-        def _setattr_prefix(self, func):
-            """Internal wrapping method.
-
-            Args:
-                func (function): The function to wrap
-            """
-            def wrapper(self, name: str, value: Any) -> None:
-                """Internal wrapping method.
-                Monkeypatch prefix to .__setattr__
-
-                Args:
-                    name (str): Attribute name
-                    value (Any): Attribute value
-                """
-                if name in _extra and value:
-                    func(name, _extra[name](value))
-                    return
-                func(name, value)
-
-            return wrapper
-
-        Mod.__setattr__ = _setattr_prefix(self, self.__setattr__)
-
-        _extra: dict[str, function[Any, Any]] = {
-            "unpacked_content_fp": 
-            lambda v : abspath(v),
-            "output_fp":
-            lambda v : [abspath(x) for x in v] if v != [""] else [abspath("")]
-        }
-        """Internal dict for the __setattr__ monkeypatch."""
-        
         self.manifest: "dict[str, str|list[str]|dict[str,str]]" = {
             "Name": name,
             "Author": author,
@@ -364,6 +704,12 @@ class Mod:
 
         self.unpacked_content_fp : str = None
         """The filepath for the unpacked Stardew Valley content folder."""
+        self.content_cache: ContentCache = _CONTENT_CACHE
+        """Cache of parsed unpacked content files, shared by every eval_entry call (and every mod) in the process."""
+        self.content_index: ContentIndex = None
+        """Index of the unpacked content folder, if built with Mod.IndexContent."""
+        self.reload_client: ReloadClient = _RELOAD_CLIENT
+        """Sends reload commands to SMAPI when Mod.AUTO_RELOAD is set. Shared by every mod in the process."""
         self.output_fp : list[str] = [""]
         """The list of output filepaths to create the mod in."""
         self.dirname: str = "NewMod"
@@ -371,21 +717,29 @@ class Mod:
         self.files: list[ContentFile] = []
         """The list of ContentFile objects registered with the mod."""
 
-        self.entries: dict[int, dict[str, EntryDict]] = {}
+        self.entries: dict[PatchKey, dict[str, EntryDict]] = {}
         """Contains the registered entries for the mod."""
-        self.moveentries: dict[int, dict[str, EntryDict]] = {}
+        self.moveentries: dict[PatchKey, dict[str, EntryDict]] = {}
         """Contains the MoveEntries data for the mod."""
 
         self.i18n_internal: dict[str, dict[str, str]] = {}
         """i18n dict. Use Mod.i18n(key) to get the i18n reference token for the given key."""
 
-        global _MOD
-        _MOD = self
-
-        self._hash_lookup: dict[int, dict[str, str|list]] = {}
-        """Internally used entry hash table."""
-
-        self._file = stack()[1].filename
+        self.assets: dict[str, str] = {}
+        """Assets fetched with Mod.FetchImage, as a mapping of path within the mod to source file path."""
+        self.asset_store: AssetStore = _ASSET_STORE
+        """Content hashes of asset files, shared by every mod in the process."""
+        self._asset_paths: dict[str, str] = {}
+        """Path within the mod of each fetched asset, by content hash. Used to deduplicate identical assets."""
+        self.atlases: dict[tuple[int, int], Atlas] = {}
+        """Sprites fetched with Mod.FetchSprite, packed into tilesheets by tile size."""
+
+        ## the newest Mod is built by default; use "with mod:" to switch between mods ##
+        _CURRENT_MOD.set(self)
+        _LAST_MOD = self
+
+        ## the caller's file, without building frame info for the whole stack like inspect.stack() ##
+        self._file = abspath(sys._getframe(1).f_code.co_filename)
         """Used to help resolve relative imports."""
 
         self.PREFIX_WITH_MODID: bool = True
@@ -394,10 +748,46 @@ class Mod:
         """Whether to automatically register new Entry objects."""
         self.AUTO_RELOAD: bool = False
         """Whether or not to automatically reload the mod through SMAPI. Requires the WebServerCommands mod (and SMAPI running)."""
+        self.ASSET_LINK_MODE: str = "copy"
+        """How assets reach every output directory after the first: "copy", "hardlink" or "reflink". Linking falls back to copying when it isn't possible."""
+        self.encoder: JsonEncoder = JsonEncoder()
+        """Encodes the output files. Use e.g. JsonEncoder(compact=True, backend="auto") for minified release builds."""
+        self.sharding: "ShardPolicy|None" = None
+        """Splits the mod's own entries into generated content files, e.g. ShardPolicy("count", 1000). None keeps them in content.json."""
+        self.BUILD_WORKERS: int = 1
+        """How many processes Mod.Create uses to serialize output files. 1 builds serially, streaming every file to disk as it is encoded."""
+        self.INCREMENTAL: bool = watching()
+        """Whether Mod.Create should skip files whose inputs are unchanged since the last build, using a build manifest kept in the mod folder. Always on in watch mode."""
+
+        self.last_report: BuildReport = None
+        """The report of the last Mod.Create call, if any."""
+        self.PROFILE: bool = False
+        """Whether to record where build time goes (see: Profiler). The profile is returned in BuildReport.profile."""
+        self.profiler: Profiler = Profiler()
+        """Records the current build's timings, counts and output sizes while Mod.PROFILE is set."""
+        self.profile_hook: "Callable[[dict[str, Any]], None]" = None
+        """Called with the profile report after every profiled build, e.g. to save it for CI."""
 
         self._logged = set()
 
 
+    def __enter__(self) -> "Mod":
+        """Makes this the Mod being built in the current context until the ``with`` block ends (see: current_mod).
+
+        Entries, ContentFiles and Entry_Curry factories used inside the block register with this
+        mod, even if other mods were created since. Each thread has its own context, so several
+        mods can be built concurrently, one per thread.
+        """
+        _ENTERED.set((*_ENTERED.get(), _CURRENT_MOD.get()))
+        _CURRENT_MOD.set(self)
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        *entered, previous = _ENTERED.get()
+        _ENTERED.set(tuple(entered))
+        _CURRENT_MOD.set(previous)
+
+
     def _log_once(self, msg: str) -> None:
         if not hash(msg) in self._logged:
             print(msg)
@@ -419,6 +809,8 @@ class Mod:
     def Register(self, *entries: Entry) -> None:
         """Registers Entry objects with the mod. (also see: pytocp.AUTO_REGISTER)
         """
+        profile = self.PROFILE
+        if profile: start = perf_counter()
 
         for entry in entries:
 
@@ -430,23 +822,269 @@ class Mod:
                 self.entries[entry.hash][entry.entry_id] = entry.entry
 
 
+            ## copied, so the entry's own list (or a shared default) is never extended ##
             if entry.moveentries is None:
                 self.moveentries[entry.hash] = None
-            elif not entry.hash in self.moveentries:
-                self.moveentries[entry.hash] = entry.moveentries
+            elif self.moveentries.get(entry.hash) is None:
+                self.moveentries[entry.hash] = [*entry.moveentries]
             else:
                 self.moveentries[entry.hash] += entry.moveentries
 
+        if profile: self.profiler.add("merge", perf_counter() - start)
+
+
+    def RegisterMany(self, entries: "Iterable[Entry]") -> None:
+        """Registers many Entry objects with the mod at once (also see: Entry.from_records)
+
+        Entries are grouped by patch, and each group is inserted into Mod.entries with a single
+        update. Registration order within a patch is kept.
+
+        Args:
+            entries (Iterable[Entry]): The entries to register.
+        """
+        profile = self.PROFILE
+        if profile: start = perf_counter()
+
+        groups: dict[PatchKey, list[Entry]] = {}
+
+        for entry in entries:
+            if entry.entry is None or entry.moveentries is None:
+                self.Register(entry)
+                continue
+
+            groups.setdefault(entry.hash, []).append(entry)
+
+        for entry_hash, group in groups.items():
+            if self.entries.get(entry_hash) is None:
+                self.entries[entry_hash] = {}
+
+            self.entries[entry_hash].update([(entry.entry_id, entry.entry) for entry in group])
+
+            moveentries = [move for entry in group for move in entry.moveentries]
+
+            if self.moveentries.get(entry_hash) is None:
+                self.moveentries[entry_hash] = moveentries
+            else:
+                self.moveentries[entry_hash] += moveentries
+
+        if profile: self.profiler.add("merge", perf_counter() - start)
+
+
+    def _change(self, hash_key: PatchKey, entries: "dict|None", moveentries: dict, with_moves: bool = True) -> dict[str, Any]:
+        """Internal method. Builds the Content Patcher change for one patch.
+
+        Args:
+            hash_key (PatchKey): The patch's entry hash.
+            entries (dict | None): The patch's entries.
+            moveentries (dict): Registered MoveEntries data, keyed by entry hash.
+            with_moves (bool, optional): Whether to add the patch's MoveEntries. Defaults to True.
+
+        Returns:
+            dict[str, Any]: The change.
+        """
+        change = {
+            key: value
+            for key, value in (
+                ("Action", hash_key.action),
+                ("Target", hash_key.target),
+                ("TargetField", [*hash_key.targetfield]),
+                ("FromFile", hash_key.fromfile),
+                ("Priority", hash_key.priority)
+            )
+            if value
+        }
+
+        if not entries is None:
+            change["Entries"] = entries
+
+        if with_moves and hash_key in moveentries and not moveentries[hash_key] == []:
+            change["MoveEntries"] = moveentries[hash_key]
+
+        return change
+
+
+    def _changes(self, entries: dict, moveentries: dict, keys: "Iterable[PatchKey]" = None) -> Iterator[dict[str, Any]]:
+        """Internal method. Generates the Content Patcher change list for a set of registered entries.
+
+        Args:
+            entries (dict): Registered entries, keyed by entry hash (see: Mod.entries, ContentFile.entries).
+            moveentries (dict): Registered MoveEntries data, keyed by entry hash.
+            keys (Iterable[PatchKey], optional): Only generate these entry hashes, in this order. Defaults to every entry hash.
+
+        Yields:
+            dict[str, Any]: One change per entry hash.
+        """
+        for hash_key in entries if keys is None else keys:
+            yield self._change(hash_key, entries[hash_key], moveentries)
+
+
+    def _shard_changes(self, shard: Shard) -> Iterator[dict[str, Any]]:
+        """Internal method. Generates the change list of a shard of Mod.entries (see: Mod.sharding).
+
+        Yields:
+            dict[str, Any]: One change per patch, or part of a patch, in the shard.
+        """
+        for piece in shard.pieces:
+            entries = self.entries[piece.key]
+
+            if not piece.ids is None:
+                entries = {entry_id: entries[entry_id] for entry_id in piece.ids}
+
+            yield self._change(piece.key, entries, self.moveentries, piece.last)
+
+
+    def _encode_all(self, documents: list[Any]) -> "Iterator[bytes]":
+        """Internal method. Encodes documents in order with Mod.encoder, across Mod.BUILD_WORKERS processes when set.
+
+        The workers run the same encoder as a serial build, so the output is byte-identical.
+        If the process pool can't be used (or fails), the remaining documents are encoded serially.
+
+        Args:
+            documents (list[Any]): The json serializable documents.
+
+        Returns:
+            Iterator[bytes]: The encoded documents, in the same order.
+        """
+        done = 0
+
+        if self.BUILD_WORKERS > 1 and len(documents) > 1:
+            ## workers are forked, so generator scripts don't need a __main__ guard ##
+            from multiprocessing import get_context, get_all_start_methods
+
+            if not "fork" in get_all_start_methods():
+                self._log_once("Parallel builds need the fork start method; building serially.")
+            else:
+                try:
+                    from concurrent.futures import ProcessPoolExecutor
+
+                    with ProcessPoolExecutor(self.BUILD_WORKERS, mp_context=get_context("fork")) as pool:
+                        for data in pool.map(
+                            self.encoder.encode,
+                            documents,
+                            chunksize=max(1, len(documents) // (self.BUILD_WORKERS * 4))
+                        ):
+                            yield data
+                            done += 1
+                    return
+                except Exception as e:
+                    print(f"Parallel build failed with {e.__class__.__name__}; building the rest serially.")
+
+        for document in documents[done:]:
+            yield self.encoder.encode(document)
+
+
+    def _stream(self, writer: FanOutWriter, relpath: str, document: Any, mod_dirs: list[str]) -> None:
+        """Internal method. Encodes a document chunk by chunk straight into the staged output files.
+
+        Args:
+            writer (FanOutWriter): The build's writer.
+            relpath (str): Path of the file within the mod folder.
+            document (Any): The json serializable document.
+            mod_dirs (list[str]): The compiled mod folders to write to.
+        """
+        chunks = self.encoder.iterencode(document)
+
+        if not self.PROFILE:
+            return writer.stream(relpath, chunks, mod_dirs)
+
+        ## encoding and writing interleave, so split the time chunk by chunk ##
+        serialized = 0.0
+
+        def timed() -> Iterator[bytes]:
+            nonlocal serialized
+
+            while True:
+                start = perf_counter()
+                chunk = next(chunks, None)
+                serialized += perf_counter() - start
+
+                if chunk is None:
+                    return
+                yield chunk
+
+        start = perf_counter()
+        writer.stream(relpath, timed(), mod_dirs)
+
+        self.profiler.add("serialize", serialized)
+        self.profiler.add("write", perf_counter() - start - serialized)
+
+
+    def Create(self, dirname: str = None) -> BuildReport:
+        """Compiles the mod in all directories (also see: Mod.INCREMENTAL)
 
-    def Create(self, dirname: str = None) -> None:
-        """Compiles the mod in all directories
+        The build runs as one pass: collect every output document, then serialize it once and
+        write it to each output directory. Changes are generated while they are written, so
+        memory doesn't grow with the size of the output (unless Mod.BUILD_WORKERS is set).
+        Nothing is registered with the mod while building, so calling Create repeatedly
+        produces the same output.
 
         Args:
             dirname (str, optional): Optional dirname override. Will default to the mod name.
+
+        Returns:
+            BuildReport: The files that were rewritten and skipped.
         """
         if not dirname: dirname = self.manifest["Name"]
         self.dirname = dirname
-        
+
+
+        ## collect documents; their change lists are generated as they are written ##
+
+        changes_started = perf_counter()
+
+        documents: list[tuple[str, Any]] = [("manifest.json", self.manifest)]
+
+        content_load_string = []
+
+        shards = [] if self.sharding is None else self.sharding.split(self.entries)
+
+        for shard in shards:
+            content_load_string.append(shard.relpath)
+            documents.append((shard.relpath, {"Changes": Stream(lambda shard=shard: self._shard_changes(shard))}))
+
+        sharded = {piece.key for shard in shards for piece in shard.pieces}
+
+        for contentfile in self.files:
+            relpath = f"code/{contentfile.name}.json"
+            content_load_string.append(relpath)
+
+            documents.append((
+                relpath,
+                {"Changes": Stream(lambda contentfile=contentfile: self._changes(contentfile.entries, contentfile.moveentries))}
+            ))
+
+        content = []
+
+        for atlas in self.atlases.values():
+            for sheet in range(len(atlas.sheets())):
+                content.append({
+                    "Action": "Load",
+                    "Target": atlas.target(sheet),
+                    "FromFile": atlas.relpath(sheet)
+                })
+
+        if len(content_load_string) > 0:
+            content.append({
+                "Action": "Include",
+                "FromFile": ", ".join(content_load_string)
+            })
+
+        documents.append(("content.json", {"Format":"2.2.0","Changes":Stream(
+            lambda: chain(self._changes(self.entries, self.moveentries, (key for key in self.entries if not key in sharded)), content)
+        )}))
+
+        for locale in self.i18n_internal:
+            documents.append((f"i18n/{locale}.json", self.i18n_internal[locale]))
+
+        self.profiler.add("changes", perf_counter() - changes_started)
+
+        if self.PROFILE:
+            for registered in [self.entries, *[contentfile.entries for contentfile in self.files]]:
+                self.profiler.count("patches", len(registered))
+                self.profiler.count("entries", sum(len(entries) for entries in registered.values() if entries))
+
+
+        ## create directories ##
 
         def trymkdir(path: str, folder_name: str) -> None:
             """Internal method.
@@ -467,198 +1105,243 @@ class Mod:
             except Exception as e:
                 print(f"Cannot create {folder_name} folder, an unknown error occurred.")
 
+        ## every parent folder, sorted so parents are created first (e.g. code, then code/shards) ##
+        subdirs = sorted({
+            "/".join(parts[:depth])
+            for parts in [
+                relpath.split("/")
+                for relpath in [*[relpath for relpath, _ in documents], *self.assets, *[atlas.relpath(0) for atlas in self.atlases.values()]]
+            ]
+            for depth in range(1, len(parts))
+        })
 
         for odir in self.output_fp:
             trymkdir(join(odir, dirname), "mod")
 
+            for subdir in subdirs:
+                trymkdir(join(odir, dirname, *subdir.split("/")), subdir)
 
-        def writefile(name: "str|None", subdir: str = None, fp: str = None) -> Any:
-            """Internal method.
 
-            Args:
-                name (str|None): 
-                subdir (str, optional): Within the main mod, the subfolder to write to. Defaults to None.
-                fp (str, optional): The base file path to write to. Defaults to None.
+        ## serialize once, fan out to every output directory ##
 
-            Returns:
-                Any: Either the opened file to be written to, or a lambda currying ``subdir``.
-            """
-            
-            return open(join(fp, dirname, "" if subdir is None else subdir, name + ".json"), "w")
+        mod_dirs = {odir: join(odir, dirname) for odir in self.output_fp}
+        manifests = {odir: BuildManifest(mod_dirs[odir]) for odir in self.output_fp}
 
-        for odir in self.output_fp:
-            try:
-                writefile("manifest", fp=odir).write(json.dumps(self.manifest, indent=4))
-                self._log_once("Successfully wrote manifest.json")
-            except Exception as e:
-                print(f"Couldn't write manifest.json with error: {e}")
-                
-        if len(self.files) > 0:
-            for odir in self.output_fp:
-                trymkdir(join(odir, dirname, "code"), "code")
-                
-        content_load_string = []
-        
-        for contentfile in self.files:
-            content_load_string.append(f"code/{contentfile.name}.json")
-            
-            file_content = [
-                {
-                    change_data[0]: change_data[1]
-                    for change_data in self._hash_lookup[hash_key].items()
-                    if not change_data is None
-                }
-                | {"uid": hash_key}
-                for hash_key in contentfile.entries.keys()
-            ]
-            
-            for fchange in file_content:
-                fcur_id = fchange["uid"]
-                fchange.pop("uid")
-                
-                for fc_key in [*fchange.keys()]:
-                    if not fchange[fc_key]:
-                        fchange.pop(fc_key)
-                        
-                if not contentfile.entries[fcur_id] is None:
-                    fchange["Entries"] = contentfile.entries[fcur_id]
-                    
-                if fcur_id in contentfile.moveentries.keys() and not contentfile.moveentries[fcur_id] == []:
-                    fchange["MoveEntries"] = contentfile.moveentries[fcur_id]
-                
-            for odir in self.output_fp:
-                try:
-                    writefile(contentfile.name, "code", odir)\
-                        .write(json.dumps({"Changes": file_content}, indent=4))
-                except:
-                    print(f"Couldn't write the \"{contentfile.name}\" Content File.")
-                
-            
-        if len(self.files) > 0:
-            prev_aRegister = deepcopy(self.AUTO_REGISTER)
-            self.AUTO_REGISTER = True
-            
-            Entry(
-                action = "Include",
-                fromfile = content_load_string
-            )
-            
-            self.AUTO_REGISTER = prev_aRegister
+        ## a full build rewrites the folder, so earlier fingerprints must not be trusted by the next incremental build ##
+        if not self.INCREMENTAL:
+            for manifest in manifests.values():
+                manifest.clear()
+        writer = FanOutWriter([*mod_dirs.values()], self.ASSET_LINK_MODE)
+        report = BuildReport()
 
-        
-        if len(self.files) > 0:
+        ## skip documents whose inputs are unchanged (see: Mod.INCREMENTAL) ##
+
+        pending: list[tuple[str, Any, list[str], "str|None"]] = []
+
+        for relpath, document in documents:
+            digest = fingerprint(document, self.encoder.signature) if self.INCREMENTAL else None
+
+            targets = []
             for odir in self.output_fp:
-                trymkdir(join(odir, dirname, "code"), "code")
+                if digest and manifests[odir].unchanged(relpath, digest):
+                    report.skipped.append(join(mod_dirs[odir], relpath))
+                else:
+                    targets.append(odir)
 
+            if len(targets) > 0:
+                pending.append((relpath, document, targets, digest))
 
-        content_load_string = []
+        try:
+            encoded = None
+            if self.BUILD_WORKERS > 1:
+                encoded = self._encode_all([document for _, document, _, _ in pending])
 
-        
-        for contentfile in self.files:
-            content_load_string.append(f"code/{contentfile.name}.json")
-
-            file_content = [
-                {
-                    change_data[0]: change_data[1]
-                    for change_data in self._hash_lookup[hash_key].items()
-                    if not change_data[1] is None
-                }
-                | {"uid": hash_key}
-                for hash_key in contentfile.entries.keys()
-            ]
+            for relpath, document, targets, digest in pending:
+                if encoded is None:
+                    self._stream(writer, relpath, document, [mod_dirs[odir] for odir in targets])
+                else:
+                    with self.profiler.phase("serialize"):
+                        data = next(encoded)
 
-            for fchange in file_content:
-                fcur_id = fchange["uid"]
-                fchange.pop("uid")
+                    with self.profiler.phase("write"):
+                        writer.write(relpath, data, [mod_dirs[odir] for odir in targets])
 
-                for fc_key in [*fchange.keys()]:
-                    if not fchange[fc_key]:
-                        fchange.pop(fc_key)
+                if digest:
+                    for odir in targets:
+                        manifests[odir].record(relpath, digest)
 
-                if not contentfile.entries[fcur_id] is None:
-                    fchange["Entries"] = contentfile.entries[fcur_id]
+            asset_digests: dict[str, str] = {}
 
-                if fcur_id in contentfile.moveentries.keys() and not contentfile.moveentries[fcur_id] == []:
-                    fchange["MoveEntries"] = contentfile.moveentries[fcur_id]
+            for relpath, src in self.assets.items():
+                ## assets are compared by content hash, so an unchanged asset is never rewritten ##
+                digest = self.asset_store.digest(src)
 
-            for odir in self.output_fp:
-                try:
-                    writefile(contentfile.name, "code", odir)\
-                        .write(json.dumps({"Changes": file_content}, indent=4))
-                except:
-                    print(f"Couldn't write the \"{contentfile.name}\" Content File.")
+                targets = []
+                for odir in self.output_fp:
+                    dest = join(mod_dirs[odir], relpath)
+                    if digest and ((self.INCREMENTAL and manifests[odir].unchanged(relpath, digest)) or self.asset_store.digest(dest) == digest):
+                        report.skipped.append(dest)
+                    else:
+                        targets.append(odir)
 
+                if len(targets) == 0:
+                    continue
 
-        if len(self.files) > 0:
-            prev_aRegister = deepcopy(self.AUTO_REGISTER)
-            self.AUTO_REGISTER = True
+                with self.profiler.phase("write"):
+                    writer.copy(relpath, src, [mod_dirs[odir] for odir in targets])
 
-            Entry(
-                action = "Include",
-                fromfile = content_load_string
-            )
+                if digest:
+                    for odir in targets:
+                        manifests[odir].record(relpath, digest)
+                        asset_digests[join(mod_dirs[odir], relpath)] = digest
 
-            self.AUTO_REGISTER = prev_aRegister
+            for atlas in self.atlases.values():
+                for sheet in range(len(atlas.sheets())):
+                    relpath = atlas.relpath(sheet)
+                    digest = atlas.fingerprint(sheet)
 
+                    targets = [
+                        odir for odir in self.output_fp
+                        if not (self.INCREMENTAL and digest and manifests[odir].unchanged(relpath, digest))
+                    ]
 
-        content: list[dict[str: str|int]] = [
-            {
-                change_data[0]: change_data[1]
-                for change_data in self._hash_lookup[hash_key].items()
-                if not change_data[1] is None
-            }
-            | {"uid": hash_key}
-            for hash_key in self.entries.keys()
-        ]
+                    if len(targets) == 0:
+                        report.skipped += [join(mod_dirs[odir], relpath) for odir in self.output_fp]
+                        continue
 
-        for change in content:
-            cur_id = change["uid"]
-            change.pop("uid")
+                    try:
+                        with self.profiler.phase("serialize"):
+                            data = atlas.compose(sheet)
+                    except Exception as e:
+                        print(f"Couldn't build {relpath} with error: {e}")
+                        continue
+
+                    ## a full build still leaves identical tilesheets untouched ##
+                    content_digest = sha1(data).hexdigest()
+                    for odir in [*targets]:
+                        dest = join(mod_dirs[odir], relpath)
+                        if self.asset_store.digest(dest) == content_digest:
+                            targets.remove(odir)
+                            report.skipped.append(dest)
+                            if digest:
+                                manifests[odir].record(relpath, digest)
+
+                    with self.profiler.phase("write"):
+                        writer.write(relpath, data, [mod_dirs[odir] for odir in targets])
+
+                    for odir in targets:
+                        asset_digests[join(mod_dirs[odir], relpath)] = content_digest
+                        if digest:
+                            manifests[odir].record(relpath, digest)
+
+            ## shards generated by an earlier build but not this one are removed once content.json stops including them ##
+            current_shards = [shard.relpath for shard in shards]
+            stale_shards: dict[str, list[str]] = {}
 
-            for c_key in [*change.keys()]:
-                if not change[c_key]:
-                    change.pop(c_key)
+            for odir in self.output_fp:
+                stale_shards[odir] = [relpath for relpath in manifests[odir].generated if not relpath in current_shards]
 
-            if not self.entries[cur_id] is None:
-                change["Entries"] = self.entries[cur_id]
+                for relpath in stale_shards[odir]:
+                    manifests[odir].forget(relpath)
 
-            if cur_id in self.moveentries.keys() and not self.moveentries[cur_id] == []:
-                change["MoveEntries"] = self.moveentries[cur_id]
+                manifests[odir].generated = current_shards
 
-        for odir in self.output_fp:
-            try:
-                writefile("content", fp=odir)\
-                    .write(json.dumps({"Format":"2.2.0","Changes":content}, indent=4))
-                self._log_once("Successfully wrote content.json")
-            except Exception as e:
-                print(f"Couldn't write content.json with error: {e}")
+            ## full builds overwrite an existing manifest with the cleared one, and keep tracking shards ##
+            for odir in self.output_fp:
+                if self.INCREMENTAL or manifests[odir].exists or len(current_shards) > 0:
+                    writer.write(BUILD_MANIFEST_NAME, manifests[odir].encode(), [mod_dirs[odir]])
+
+            ## every file is staged; switch each output directory over ##
+            with self.profiler.phase("write"):
+                report.written += [
+                    fp for fp in writer.commit()
+                    if not basename(fp) == BUILD_MANIFEST_NAME
+                ]
 
+            report.failed = [*writer.failed.items()]
+
+            for fp in report.written:
+                if fp in asset_digests:
+                    self.asset_store.remember(fp, asset_digests[fp])
 
-        if len(self.i18n_internal.keys()) != 0:
             for odir in self.output_fp:
-                trymkdir(join(odir, dirname, "i18n"), "i18n")
-            for locale in self.i18n_internal:
-                for odir in self.output_fp:
+                if mod_dirs[odir] in writer.failed:
+                    continue
+
+                for relpath in stale_shards[odir]:
+                    fp = join(mod_dirs[odir], *relpath.split("/"))
                     try:
-                        writefile(join("i18n", locale), fp=odir)\
-                        .write(json.dumps(self.i18n_internal[locale], indent=4))
-                    except Exception as e:
-                        print(f"Couldn't write {locale}.json with error: {e}")
+                        remove(fp)
+                        report.removed.append(fp)
+                    except OSError as e:
+                        print(f"Couldn't remove {relpath} with error: {e}")
+        finally:
+            writer.close()
+
+        compiled = [mod_dir for mod_dir in mod_dirs.values() if not mod_dir in writer.failed]
 
+        for mod_dir, reason in report.failed:
+            print(f"Failed to compile \"{self.manifest['Name']}\" at {mod_dir}: {reason}")
 
-        print(f"Successfully compiled \"{self.manifest['Name']}\" at {', '.join([join(x, dirname) for x in self.output_fp])}!")
+        if len(compiled) > 0:
+            print(f"Successfully compiled \"{self.manifest['Name']}\" at {', '.join(compiled)}!")
+        print(report.summary())
+
+        if self.PROFILE:
+            self.profiler.count("files_written", len(report.written))
+            self.profiler.count("files_skipped", len(report.skipped))
+
+            for mod_dir in mod_dirs.values():
+                for fp in report.written:
+                    if fp.startswith(mod_dir + sep):
+                        self.profiler.wrote(fp[len(mod_dir) + 1:].replace(sep, "/"), getsize(fp))
+
+            report.profile = self.profiler.report()
+            print(Profiler.summary(report.profile))
+
+            if not self.profile_hook is None:
+                self.profile_hook(report.profile)
+
+        ## the next build starts now ##
+        self.profiler.reset()
         
-        if self.AUTO_RELOAD:
-            try:
-                reload_SMAPI()
-            except Exception as e:
-                print(f"Failed to reload content pack with {e.__class__.__name__}")
-                
+        ## nothing to reload if every file was unchanged ##
+        if self.AUTO_RELOAD and len(report.written) > 0:
+            self.reload_client.request(self.manifest["UniqueId"])
+
+        self.last_report = report
+        return report
+
+
+    def Watch(self, interval: float = 0.5, debounce: float = 0.3, extra: list[str] = None) -> None:
+        """Builds the mod, then keeps the process running and rebuilds whenever the generator script, a fetched asset or the unpacked content changes.
+
+        Call this instead of Mod.Create at the end of the generator script. Rebuilds rerun the
+        script in the same process and are incremental, so only changed outputs are rewritten.
+        Bursts of changes are debounced, and SMAPI is reloaded once per settled build when
+        Mod.AUTO_RELOAD is set. Stop with Ctrl+C. (also see: python -m runner watch)
+
+        Args:
+            interval (float, optional): Seconds between checks for changes. Defaults to 0.5.
+            debounce (float, optional): Seconds files must stay unchanged before rebuilding. Defaults to 0.3.
+            extra (list[str], optional): Other files to watch, e.g. local modules the script imports. Defaults to None.
+        """
+        if watching() or batching():
+            ## this is a rebuild started by the watcher, or part of a batch build ##
+            self.Create()
+            return
+
+        self.INCREMENTAL = True
+        self.Create()
+
+        watch(self._file, self, interval, debounce, extra)
 
 
     def Destroy(self):
         """Attempts to remove every instance of the mod created by pytocp.
         """
+        from shutil import rmtree
+
         success = True
 
         def fail(_,__,___):
@@ -678,41 +1361,95 @@ class Mod:
 
 
     def FetchImage(self, fp: str, fpid: str) -> Entry:
-        """Fetches an asset for use in the content pack. Copies it to an assets folder within the mod.
+        """Fetches an asset for use in the content pack. The asset is copied to an assets folder within the mod by Mod.Create.
+
+        Relative paths are resolved against the generator script's folder. Identical files are only
+        stored once, even when fetched for several fpids, and files with the same name but different
+        contents get distinct names.
 
         Args:
             fp (str): File path for asset.
             fpid (str): Internal Content Patcher id for fetched asset.
         """
-        self.dirname = self.manifest["Name"]
+        src = abspath(join(split(self._file)[0], fp))
+        digest = self.asset_store.digest(src)
 
-        chdir(split(self._file)[0])
+        relpath = self._asset_paths.get(digest) if digest else None
 
-        for odir in self.output_fp:
-            try:
-                mkdir(join(odir, self.dirname, "assets"))
-            except IsADirectoryError:
-                self._log_once("Skipping making assets folder - already exists")
-            except FileExistsError:
-                self._log_once("Skipping making assets folder - already exists")
-            except FileNotFoundError:
-                print("Invalid directory passed.")
-            except Exception as e:
-                print(f"An unknown error occured: {e}")
+        if relpath is None:
+            relpath = "assets/" + basename(src)
 
-        for odir in self.output_fp:
-            try:
-                copyfile(fp, join(odir, self.dirname, "assets", basename(fp)))
-            except Exception as e:
-                self._log_once(f"Failed to add asset ({fp}) to mod with {e.__class__.__name__}. Using directory: {abspath(fp)}.")
+            if self.assets.get(relpath, src) != src:
+                stem, ext = splitext(basename(src))
+                relpath = f"assets/{stem}-{digest[:8] if digest else len(self.assets)}{ext}"
 
+            self.assets[relpath] = src
+            if digest:
+                self._asset_paths[digest] = relpath
 
-        return Entry(
-            action = "Load",
-            target = fpid,
-            fromfile = "assets/" + basename(fp)
-        )
+        with self:
+            return Entry(
+                action = "Load",
+                target = fpid,
+                fromfile = relpath
+            )
+
+
+    def FetchSprite(self, fp: str, tile_size: tuple[int, int] = (16, 16)) -> Sprite:
+        """Fetches a sprite and packs it into a shared tilesheet instead of loading it as its own texture.
+
+        Sprites are grouped by tile size into atlases (see: Mod.atlases). Mod.Create draws each
+        tilesheet and loads it, so the returned texture and index can be used directly in data
+        entries. Identical sprites share one tile. Relative paths are resolved against the
+        generator script's folder.
+
+        Args:
+            fp (str): File path for the PNG sprite.
+            tile_size (tuple[int, int], optional): The tile width and height of the tilesheet. Defaults to (16, 16), the size of object sprites.
+
+        Returns:
+            Sprite: The sprite's texture (Content Patcher target) and sprite index.
+
+        Raises:
+            ValueError: The sprite isn't a PNG image, or is larger than ``tile_size``.
+        """
+        src = abspath(join(split(self._file)[0], fp))
+
+        width, height = png_size(src)
+        if width > tile_size[0] or height > tile_size[1]:
+            raise ValueError(f"{fp} is {width}x{height}, larger than the {tile_size[0]}x{tile_size[1]} tiles it was fetched for.")
+
+        atlas = self.atlases.get(tuple(tile_size))
+        if atlas is None:
+            atlas = self.atlases[tuple(tile_size)] = Atlas(*tile_size)
+
+        return atlas.add(src, self.asset_store.digest(src))
+
+
+    def IndexContent(self, index_fp: str = None) -> ContentIndex:
+        """Builds (or refreshes) a persisted index of the unpacked content folder (see: Mod.unpacked_content_fp).
+
+        The first call scans every json asset once; later calls, even in new processes, only
+        re-scan assets whose modification time changed. Once indexed, target resolution and
+        vanilla key lookups no longer open the asset files.
+
+        Args:
+            index_fp (str, optional): Where to persist the index. Defaults to a file in the unpacked content folder.
+
+        Returns:
+            ContentIndex: The index, also stored in Mod.content_index.
+        """
+        if self.unpacked_content_fp is None:
+            raise ValueError("Set Mod.unpacked_content_fp before indexing the unpacked content.")
+
+        self.content_index = ContentIndex(self.unpacked_content_fp, index_fp)
+        changed = self.content_index.refresh()
+
+        self._log_once(f"Indexed unpacked content ({len(self.content_index.assets)} assets, {changed} updated).")
+
+        return self.content_index
 
 
     def RegisterContentFile(self, file: ContentFile):
-        self.files.append(file)
\ No newline at end of file
+        if not file in self.files:
+            self.files.append(file)
\ No newline at end of file
@@ -0,0 +1,406 @@
+"""
+Runs PyToCP generator scripts in a warm process.
+
+Important contents:
+    (function) watch
+
+    (function) watching
+
+    (function) batch
+
+    (function) batching
+
+    (function) discover
+
+    (function) main
+
+Usage:
+    python -m runner watch path/to/generator.py
+    python -m runner batch path/to/mods
+"""
+
+from os import scandir, stat, walk, sep
+from os.path import abspath, basename, dirname, isfile, join
+from contextvars import Context
+from time import sleep, perf_counter
+from typing import Any
+import json
+import sys
+
+_WATCHING = False
+"""Whether generator scripts are being run by the watcher."""
+_BATCHING = False
+"""Whether generator scripts are being run by the batch builder."""
+_GENERATOR = r"^(?:import pytocp|from pytocp import)"
+"""Matches the pytocp import of a generator script (multiline)."""
+
+
+def watching() -> bool:
+    """Whether the current build was started by the watcher (see: Mod.Watch)."""
+    return _WATCHING
+
+
+def batching() -> bool:
+    """Whether the current build was started by the batch builder (see: batch)."""
+    return _BATCHING
+
+
+def _run(fp: str) -> Any:
+    """Internal function. Runs a generator script and returns the last Mod it created, or None if it failed.
+
+    A script that calls sys.exit() with 0 (or no code) still succeeds; other exit codes fail it.
+    """
+    import pytocp
+    import runpy
+
+    previous = pytocp._CURRENT_MOD.get()
+
+    try:
+        runpy.run_path(fp, run_name="__main__")
+    except SystemExit as e:
+        ## scripts may end with sys.exit(); only a failing exit code fails the build ##
+        if not e.code in (0, None):
+            print(f"Failed to run {basename(fp)}: it exited with {e.code}.")
+            return None
+    except Exception:
+        from traceback import print_exc
+        print_exc()
+        print(f"Failed to run {basename(fp)}.")
+        return None
+
+    current = pytocp._CURRENT_MOD.get()
+    return None if current is previous else current
+
+
+def _forget_modules(fp: str, extra: list[str]) -> None:
+    """Internal function. Drops a script's local modules from sys.modules, so its next run imports their current code.
+
+    Local modules are the watched ``extra`` files and modules in the script's folder, except
+    installed packages (e.g. a virtual environment in that folder) and pytocp itself.
+    """
+    folder = dirname(fp) + sep
+    library = dirname(abspath(__file__)) + sep
+    watched = {abspath(path) for path in extra}
+
+    for name, module in [*sys.modules.items()]:
+        path = getattr(module, "__file__", None)
+        if name == "__main__" or path is None:
+            continue
+
+        path = abspath(path)
+        local = path.startswith(folder) and not path.startswith(library) and not f"{sep}site-packages{sep}" in path
+
+        if path in watched or local:
+            del sys.modules[name]
+
+
+def _snapshot(mod: Any, extra: list[str]) -> dict[str, "tuple[int, int]|None"]:
+    """Internal function. Returns the modification time and size of every file a build depends on."""
+    files = {}
+
+    def add(fp: str) -> None:
+        try:
+            info = stat(fp)
+            files[fp] = (info.st_mtime_ns, info.st_size)
+        except OSError:
+            files[fp] = None
+
+    def add_tree(fp: str) -> None:
+        try:
+            with scandir(fp) as it:
+                for item in it:
+                    if item.is_dir():
+                        add_tree(item.path)
+                    elif item.name.endswith(".json") and not item.name.startswith(".pytocp"):
+                        info = item.stat()
+                        files[item.path] = (info.st_mtime_ns, info.st_size)
+        except OSError:
+            pass
+
+    for fp in [mod._file, *mod.assets.values(), *[src for atlas in mod.atlases.values() for src in atlas.sprites], *extra]:
+        add(abspath(fp))
+
+    if not mod.unpacked_content_fp is None:
+        add_tree(mod.unpacked_content_fp)
+
+    return files
+
+
+def watch(fp: str, mod: Any = None, interval: float = 0.5, debounce: float = 0.3, extra: list[str] = None) -> None:
+    """Runs a generator script, then reruns it whenever the script, its assets or the unpacked content change.
+
+    The process stays warm between builds: installed modules stay imported and the unpacked
+    content cache is kept. Modules in the script's folder, and the ``extra`` files, are imported
+    again on every run, so edits to them are picked up. Builds are incremental, so only changed outputs are rewritten. Changes are
+    debounced until files stop changing, and SMAPI is reloaded once per settled build (see:
+    Mod.AUTO_RELOAD). Stop with Ctrl+C.
+
+    Args:
+        fp (str): The generator script.
+        mod (Mod, optional): The already built Mod of the script, if any. Defaults to running the script first.
+        interval (float, optional): Seconds between checks for changes. Defaults to 0.5.
+        debounce (float, optional): Seconds files must stay unchanged before rebuilding. Defaults to 0.3.
+        extra (list[str], optional): Other files to watch, e.g. local modules the script imports. Defaults to None.
+    """
+    global _WATCHING
+
+    fp = abspath(fp)
+    extra = [] if extra is None else extra
+    _WATCHING = True
+
+    try:
+        if mod is None:
+            mod = _run(fp)
+
+        if mod is None:
+            print(f"{basename(fp)} did not create a Mod; nothing to watch.")
+            return
+
+        snapshot = _snapshot(mod, extra)
+        print(f"Watching {len(snapshot)} file(s) for \"{mod.manifest['Name']}\". Press Ctrl+C to stop.")
+
+        while True:
+            sleep(interval)
+            current = _snapshot(mod, extra)
+
+            if current == snapshot:
+                continue
+
+            ## wait for the burst of changes to settle ##
+            while True:
+                sleep(debounce)
+                settled = _snapshot(mod, extra)
+                if settled == current:
+                    break
+                current = settled
+
+            changed = [path for path in {*snapshot, *current} if snapshot.get(path) != current.get(path)]
+            print(f"Changed: {', '.join(basename(path) for path in changed[:5])}{' ...' if len(changed) > 5 else ''}")
+
+            _forget_modules(fp, extra)
+
+            rebuilt = _run(fp)
+            if rebuilt is None:
+                print("Waiting for the next change.")
+
+            mod = rebuilt or mod
+            snapshot = _snapshot(mod, extra)
+
+    except KeyboardInterrupt:
+        print("Stopped watching.")
+    finally:
+        _WATCHING = False
+
+
+def _is_generator(fp: str) -> bool:
+    """Internal function. Whether a python file imports pytocp and builds a mod."""
+    try:
+        with open(fp, "r", encoding="utf-8") as file:
+            text = file.read()
+    except (OSError, UnicodeDecodeError):
+        return False
+
+    import re
+
+    return bool(re.search(_GENERATOR, text, re.MULTILINE)) and ("Create(" in text or "Watch(" in text)
+
+
+def discover(paths: list[str]) -> list[str]:
+    """Finds generator scripts: python files that import pytocp and call Mod.Create (or Mod.Watch).
+
+    Folders are searched recursively, skipping hidden folders and __pycache__. Files given
+    directly are always included.
+
+    Args:
+        paths (list[str]): Folders to search, or generator scripts.
+
+    Returns:
+        list[str]: Absolute paths of the scripts, sorted per folder.
+    """
+    found = []
+
+    for path in paths:
+        path = abspath(path)
+
+        if isfile(path):
+            found.append(path)
+            continue
+
+        for root, dirs, files in walk(path):
+            dirs[:] = sorted(name for name in dirs if not name.startswith(".") and name != "__pycache__")
+
+            found += [
+                join(root, name) for name in sorted(files)
+                if name.endswith(".py") and _is_generator(join(root, name))
+            ]
+
+    return [*dict.fromkeys(found)]
+
+
+def _build(fp: str) -> "tuple[dict[str, Any], tuple[int, int, int]]":
+    """Internal function. Builds one script of a batch and returns its result, and the cache counts it added.
+
+    The script's folder comes first on sys.path while it runs, and its local modules are imported
+    afresh (see: _forget_modules), so scripts in other folders can use the same module names.
+    """
+    import pytocp
+
+    cache, assets = pytocp._CONTENT_CACHE, pytocp._ASSET_STORE
+    counts = (cache.hits, cache.misses, assets.hashed)
+    folder = dirname(fp)
+
+    start = perf_counter()
+    _forget_modules(fp, [])
+
+    ## threads the script starts fall back to the last Mod created, which must be its own ##
+    pytocp._LAST_MOD = None
+    sys.path.insert(0, folder)
+
+    try:
+        mod = Context().run(_run, fp)
+    finally:
+        sys.path.remove(folder)
+        _forget_modules(fp, [])
+
+    report = None if mod is None else mod.last_report
+
+    result = {
+        "script": fp,
+        "mod": None if mod is None else mod.manifest["Name"],
+        "ok": not report is None and len(report.failed) == 0,
+        "seconds": perf_counter() - start,
+        "written": 0 if report is None else len(report.written),
+        "skipped": 0 if report is None else len(report.skipped)
+    }
+
+    return result, (cache.hits - counts[0], cache.misses - counts[1], assets.hashed - counts[2])
+
+
+def _start_worker() -> None:
+    """Internal function. Marks a forked batch worker as batching."""
+    global _BATCHING
+    _BATCHING = True
+
+
+def batch(scripts: list[str], workers: int = 1) -> dict[str, Any]:
+    """Builds many generator scripts, sharing one startup.
+
+    Every script runs in its own context (see: pytocp.current_mod), so scripts can't see each
+    other's mods, but they share the unpacked content cache, asset hashes and SMAPI connection.
+    Each script imports its own folder's modules, like when run directly, so scripts in different
+    folders can each have e.g. their own config.py. With more than one worker, scripts are built
+    in forked processes, which start from this process's imports and caches and keep their own
+    caches from then on; without the ``fork`` start method, scripts are built one at a time.
+    Scripts calling Mod.Watch are built once. Relative paths in scripts resolve against the
+    current folder, not the script's.
+
+    Args:
+        scripts (list[str]): The generator scripts (see: discover).
+        workers (int, optional): How many scripts to build at once. Defaults to 1.
+
+    Returns:
+        dict[str, Any]: The combined timing report: "total" and "startup" seconds, a "scripts"
+            list with each script's "mod", "ok", "seconds", "written" and "skipped", and the
+            "content_cache" hits and misses and "assets_hashed" counts of all scripts.
+    """
+    global _BATCHING
+
+    started = perf_counter()
+    import pytocp
+    startup = perf_counter() - started
+
+    scripts = [abspath(fp) for fp in scripts]
+    _BATCHING = True
+
+    try:
+        builds = None
+
+        if workers > 1 and len(scripts) > 1:
+            ## sys.path and sys.modules are per process, so each concurrent script gets its own ##
+            from multiprocessing import get_context, get_all_start_methods
+
+            if "fork" in get_all_start_methods():
+                from concurrent.futures import ProcessPoolExecutor
+                with ProcessPoolExecutor(workers, mp_context=get_context("fork"), initializer=_start_worker) as pool:
+                    builds = [*pool.map(_build, scripts)]
+            else:
+                print("Building scripts at once needs the fork start method; building one at a time.")
+
+        if builds is None:
+            builds = [_build(fp) for fp in scripts]
+    finally:
+        _BATCHING = False
+
+    return {
+        "total": perf_counter() - started,
+        "startup": startup,
+        "scripts": [result for result, _ in builds],
+        "content_cache": {"hits": sum(counts[0] for _, counts in builds), "misses": sum(counts[1] for _, counts in builds)},
+        "assets_hashed": sum(counts[2] for _, counts in builds)
+    }
+
+
+def _print_batch(report: dict[str, Any]) -> None:
+    """Internal function. Prints a batch report as a table."""
+    print()
+
+    for result in report["scripts"]:
+        status = "ok" if result["ok"] else "FAILED"
+        print(
+            f"{status:>6}  {result['seconds']:7.3f}s  {result['written']:>4} written  {result['skipped']:>4} skipped  "
+            f"{result['mod'] or '-'} ({basename(result['script'])})"
+        )
+
+    failed = sum(not result["ok"] for result in report["scripts"])
+    print(
+        f"Built {len(report['scripts']) - failed} of {len(report['scripts'])} mod(s) in {report['total']:.3f}s "
+        f"(startup {report['startup']:.3f}s, content cache {report['content_cache']['hits']} hit(s) / "
+        f"{report['content_cache']['misses']} miss(es), {report['assets_hashed']} asset(s) hashed)."
+    )
+
+
+def main(argv: list[str] = None) -> None:
+    """Command line entry point. See ``python -m runner --help``."""
+    from argparse import ArgumentParser
+
+    parser = ArgumentParser(prog="python -m runner", description="Run PyToCP generator scripts.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    watch_parser = commands.add_parser("watch", help="Build a generator script and rebuild it on every change.")
+    watch_parser.add_argument("script", help="The generator script.")
+    watch_parser.add_argument("--interval", type=float, default=0.5, help="Seconds between checks for changes.")
+    watch_parser.add_argument("--debounce", type=float, default=0.3, help="Seconds files must stay unchanged before rebuilding.")
+    watch_parser.add_argument("--also", nargs="*", default=[], help="Other files to watch.")
+
+    batch_parser = commands.add_parser("batch", help="Build every generator script found in one process.")
+    batch_parser.add_argument("paths", nargs="*", default=["."], help="Folders to search for generator scripts, or scripts.")
+    batch_parser.add_argument("--workers", type=int, default=1, help="How many scripts to build at once.")
+    batch_parser.add_argument("--out", help="Save the timing report to this json file.")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "watch":
+        watch(args.script, interval=args.interval, debounce=args.debounce, extra=args.also)
+
+    elif args.command == "batch":
+        scripts = discover(args.paths)
+
+        if len(scripts) == 0:
+            print("No generator scripts found.")
+            sys.exit(1)
+
+        report = batch(scripts, args.workers)
+        _print_batch(report)
+
+        if args.out:
+            with open(args.out, "w") as file:
+                json.dump(report, file, indent=4)
+
+        if not all(result["ok"] for result in report["scripts"]):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    ## run through the importable module, so its state is shared with pytocp ##
+    from runner import main as _main
+    _main()
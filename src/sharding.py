@@ -0,0 +1,196 @@
+"""
+Splits the entries registered with a Mod into generated content files (see: Mod.sharding).
+
+Important contents:
+    (class) ShardPolicy
+
+    (class) Shard
+"""
+
+from hashlib import sha1
+from zlib import crc32
+from typing import Any, NamedTuple
+from helper import json_default, flatten
+import json
+
+SHARD_DIR = "code/shards"
+"""Folder within the compiled mod that shards are written to."""
+
+_encode_compact = json.JSONEncoder(separators=(",", ":"), default=json_default).encode
+
+
+class Piece(NamedTuple):
+    """The part of one patch that is written to a shard.
+
+    Args:
+        key (PatchKey): The patch's entry hash.
+        ids (list[str] | None): The entry ids in this piece, or None if it holds the whole patch.
+        last (bool): Whether the piece ends the patch, and so carries its MoveEntries.
+    """
+    key: Any
+    ids: "list[str]|None"
+    last: bool
+
+
+class Shard(NamedTuple):
+    """One generated content file.
+
+    Args:
+        name (str): The file name, without folder or extension.
+        pieces (list[Piece]): The patches (or parts of patches) in the file, in order.
+    """
+    name: str
+    pieces: list[Piece]
+
+    @property
+    def relpath(self) -> str:
+        """Path of the shard within the compiled mod."""
+        return f"{SHARD_DIR}/{self.name}.json"
+
+
+def _safe_name(target: str) -> str:
+    """Internal function. Turns a target into a file name, e.g. "Data/Objects" into "Data_Objects"."""
+    return "".join(c if c.isalnum() or c in "-." else "_" for c in target).strip("_.") or "shard"
+
+
+class ShardPolicy:
+    """How Mod.Create splits the mod's own entries into generated content files (see: Mod.sharding).
+
+    Shards are written to code/shards/ and included from content.json, in registration order.
+    Each shard is a separate file, so an incremental build (see: Mod.INCREMENTAL) only rewrites
+    the shards an edit touched. Patches without a Target stay in content.json.
+
+    Policies:
+        target: One shard per target. ``limit`` is unused.
+        count: Shards of at most ``limit`` entries.
+        size: Shards of at most ``limit`` bytes of entries, measured as compact json (the files are larger).
+
+    With "count" and "size", shard boundaries are picked from the entry ids rather than their
+    positions, and each shard is named after the entry just before it. Adding or removing an
+    entry usually only rewrites its own shard. Removing the entry a shard ends on merges it into
+    the following shards until their boundaries line up again, which rewrites (or removes) a few
+    of them and content.json. Shards are typically about half of
+    ``limit``, and large patches are split across shards.
+
+    Only shards a build generated are ever removed, so other files in code/shards/ are kept.
+
+    Args:
+        by (str, optional): "target", "count" or "size". Defaults to "target".
+        limit (int, optional): Maximum entries ("count") or bytes ("size") per shard. Defaults to 1000 entries or 1 MiB.
+
+    Raises:
+        ValueError: The policy is unknown, or the limit isn't positive.
+    """
+
+    POLICIES = ("target", "count", "size")
+    DEFAULT_LIMITS = {"target": None, "count": 1000, "size": 1 << 20}
+
+    def __init__(self, by: str = "target", limit: int = None):
+        if not by in self.POLICIES:
+            raise ValueError(f"Unknown sharding policy \"{by}\". Expected one of {', '.join(self.POLICIES)}.")
+
+        if not limit is None and limit < 1:
+            raise ValueError(f"The shard limit must be positive, not {limit}.")
+
+        self.by = by
+        self.limit = self.DEFAULT_LIMITS[by] if limit is None else limit
+
+    def split(self, entries: dict) -> list[Shard]:
+        """Splits registered entries into shards.
+
+        Args:
+            entries (dict): Registered entries, keyed by entry hash (see: Mod.entries).
+
+        Returns:
+            list[Shard]: The shards, in the order they are included.
+        """
+        if self.by == "target":
+            return self._by_target(entries)
+
+        return self._by_weight(entries)
+
+    def _by_target(self, entries: dict) -> list[Shard]:
+        """Internal method. Puts every patch in the shard of its target."""
+        shards: dict[str, Shard] = {}
+
+        for key in entries:
+            if not key.target:
+                continue
+
+            name = _safe_name(key.target)
+
+            ## names that only differ in case would share a file on Windows and macOS ##
+            shard = shards.setdefault(name.lower(), Shard(name, []))
+            shard.pieces.append(Piece(key, None, True))
+
+        return [*shards.values()]
+
+    def _weight(self, entry_id: Any, entry: Any) -> int:
+        """Internal method. Returns how much an entry counts towards the shard limit."""
+        if self.by == "count":
+            return 1
+
+        return len(_encode_compact(entry_id)) + len(_encode_compact(flatten(entry))) + 2
+
+    def _by_weight(self, entries: dict) -> list[Shard]:
+        """Internal method. Cuts the entries into shards of at most ``limit`` weight, at content-defined boundaries."""
+        shards: list[Shard] = []
+        pieces: list[Piece] = []
+        boundary = ""
+        unit = ""
+        weight = 0
+
+        ## past a quarter of the limit, cut after an entry with a probability proportional to its weight ##
+        floor = max(1, self.limit // 4)
+
+        def cut() -> None:
+            nonlocal pieces, boundary, weight
+
+            ## named after the entry before the shard, so removing its own first entry keeps the name ##
+            if len(pieces) > 0:
+                shards.append(Shard(f"shard-{sha1(boundary.encode('utf-8')).hexdigest()[:8]}", pieces))
+                boundary = unit
+
+            pieces = []
+            weight = 0
+
+        for key, patch in entries.items():
+            if not key.target:
+                continue
+
+            items = [(None, None)] if not patch else patch.items()
+            remaining = len(items)
+            prefix = f"{key}\0"
+
+            for entry_id, entry in items:
+                remaining -= 1
+                unit_weight = 1 if entry_id is None else self._weight(entry_id, entry)
+
+                if weight > 0 and weight + unit_weight > self.limit:
+                    cut()
+
+                unit = prefix + str(entry_id)
+
+                if len(pieces) > 0 and pieces[-1].key == key:
+                    pieces[-1].ids.append(entry_id)
+                else:
+                    pieces.append(Piece(key, [entry_id], False))
+
+                if remaining == 0:
+                    pieces[-1] = pieces[-1]._replace(last=True)
+
+                weight += unit_weight
+
+                if weight >= floor and crc32(unit.encode("utf-8")) * floor < unit_weight << 32:
+                    cut()
+
+        cut()
+
+        ## pieces that hold a whole patch don't need their entries copied ##
+        for shard in shards:
+            for i, piece in enumerate(shard.pieces):
+                patch = entries[piece.key]
+                if not patch or len(piece.ids) == len(patch):
+                    shard.pieces[i] = piece._replace(ids=None)
+
+        return shards
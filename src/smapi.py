@@ -0,0 +1,105 @@
+"""
+Talks to a running game through SMAPI. Requires the WebServerCommands mod.
+
+Important contents:
+    (class) ReloadClient
+"""
+
+from threading import Lock, Timer
+from typing import Any
+import atexit
+
+WEB_SERVER_COMMANDS_URL = "http://127.0.0.1:56802/execute"
+"""The default WebServerCommands endpoint."""
+
+
+class ReloadClient:
+    """Sends Content Patcher ``patch reload`` commands to SMAPI.
+
+    One pooled HTTP session is reused for every command, and every request has a timeout, so
+    a hung game can't block a build. ReloadClient.request is fire-and-forget: requests made
+    within ``window`` seconds of each other are merged into one reload per content pack and
+    sent from a background thread. Pending requests are flushed when the process exits.
+
+    Args:
+        url (str, optional): The WebServerCommands endpoint. Defaults to WEB_SERVER_COMMANDS_URL.
+        timeout (float, optional): Seconds to wait for the game to answer. Defaults to 2.
+        window (float, optional): Seconds to wait for more requests before sending. Defaults to 0.25.
+    """
+
+    def __init__(self, url: str = WEB_SERVER_COMMANDS_URL, timeout: float = 2, window: float = 0.25):
+        self.url = url
+        self.timeout = timeout
+        self.window = window
+
+        self._session = None
+        self._pending: dict[str, None] = {}
+        self._timer: Timer = None
+        self._lock = Lock()
+
+        atexit.register(self.flush)
+
+    def _get_session(self) -> Any:
+        """Internal method. Returns the pooled session, creating it on first use."""
+        if self._session is None:
+            from requests import Session
+            self._session = Session()
+
+        return self._session
+
+    def reload(self, uid: str) -> bool:
+        """Reloads a content pack now, waiting at most ``timeout`` seconds for the game.
+
+        Args:
+            uid (str): The content pack's unique id.
+
+        Returns:
+            bool: Whether the game accepted the command.
+        """
+        try:
+            response = self._get_session().get(self.url + f"?command=patch reload {uid}", timeout=self.timeout)
+            response.raise_for_status()
+        except Exception as e:
+            print(f"Failed to reload content pack with {e.__class__.__name__}")
+            return False
+
+        return True
+
+    def request(self, uid: str) -> None:
+        """Schedules a reload of a content pack without waiting for it.
+
+        Repeated requests within ``window`` seconds are merged into one reload.
+
+        Args:
+            uid (str): The content pack's unique id.
+        """
+        with self._lock:
+            self._pending[uid] = None
+
+            if not self._timer is None:
+                self._timer.cancel()
+
+            self._timer = Timer(self.window, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self) -> None:
+        """Sends every pending reload now."""
+        with self._lock:
+            if not self._timer is None:
+                self._timer.cancel()
+                self._timer = None
+
+            pending = [*self._pending]
+            self._pending.clear()
+
+        for uid in pending:
+            self.reload(uid)
+
+    def close(self) -> None:
+        """Sends pending reloads and closes the pooled session."""
+        self.flush()
+
+        if not self._session is None:
+            self._session.close()
+            self._session = None
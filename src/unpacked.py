@@ -0,0 +1,417 @@
+"""
+Access to the unpacked Stardew Valley content folder (see: Mod.unpacked_content_fp).
+
+Important contents:
+    (class) ContentCache
+
+    (class) ContentIndex
+
+    (function) read_subtree
+"""
+
+from collections import OrderedDict
+from os import stat, walk, replace
+from os.path import join, relpath, splitext
+from typing import Any, Iterator
+from mmap import mmap, ACCESS_READ
+from threading import RLock
+from helper import rec_trav
+import json
+import re
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_MEMBER = re.compile(r'[ \t\n\r]*("(?:[^"\\]|\\.)*")[ \t\n\r]*:[ \t\n\r]*')
+_SEPARATOR = re.compile(r"[ \t\n\r]*([,}\]])")
+_WINDOW = 1024 * 1024
+_scan_once = json.JSONDecoder().scan_once
+
+
+class _Scanner:
+    """Internal class. Walks a memory mapped json file through a sliding, decoded window.
+
+    The window is decoded as latin-1, which maps every byte to one character, so positions in
+    the window are byte offsets into the file. Values that are skipped are scanned by the C
+    json scanner and thrown away; only the requested value is decoded as utf-8.
+
+    Args:
+        buf (mmap): The mapped file.
+    """
+
+    def __init__(self, buf: mmap):
+        self.buf = buf
+        self.base = 0
+        self.text = ""
+        self.size = _WINDOW
+
+    def _local(self, pos: int, grow: bool = False) -> int:
+        """Internal method. Returns the window index of byte ``pos``, moving the window as needed.
+
+        With ``grow``, the window is reloaded from ``pos`` because a value starting there didn't fit.
+        """
+        ## only grow when the window already starts at ``pos``; otherwise moving it is enough ##
+        if grow and self.base == pos:
+            self.size *= 4
+
+        if grow or not self.base <= pos < self.base + len(self.text):
+            self.base = pos
+            self.text = self.buf[pos:pos + self.size].decode("latin-1")
+
+        return pos - self.base
+
+    def _truncated(self) -> bool:
+        """Internal method. Whether the window ends before the file does."""
+        return self.base + len(self.text) < len(self.buf)
+
+    def match(self, pattern: "re.Pattern", pos: int) -> "tuple[re.Match, int]|tuple[None, int]":
+        """Matches ``pattern`` at byte ``pos``, making sure the match isn't cut off by the window.
+
+        Returns:
+            tuple[re.Match|None, int]: The match, and the byte offset its indexes are relative to.
+        """
+        grow = False
+
+        while True:
+            local = self._local(pos, grow)
+            match = pattern.match(self.text, local)
+
+            if (match is None or match.end() == len(self.text)) and self._truncated():
+                grow = True
+                continue
+
+            return match, self.base
+
+    def skip_value(self, pos: int) -> int:
+        """Returns the position right after the json value starting at byte ``pos``."""
+        grow = False
+
+        while True:
+            local = self._local(pos, grow)
+
+            try:
+                end = _scan_once(self.text, local)[1]
+            except (StopIteration, ValueError):
+                if not self._truncated():
+                    raise ValueError(f"Invalid json value at byte {pos}.")
+                grow = True
+                continue
+
+            ## a bare number cut off by the window would still scan ##
+            if end == len(self.text) and self._truncated():
+                grow = True
+                continue
+
+            return self.base + end
+
+    def find_member(self, pos: int, key: str) -> int:
+        """Returns the start of the value stored under ``key`` in the object or array at byte ``pos``.
+
+        Raises:
+            KeyError: The key is not in the object, or the index is out of range for the array.
+            TypeError: The value at ``pos`` is not an object or array.
+        """
+        match, base = self.match(_WHITESPACE, pos)
+        first = self.buf[base + match.end():base + match.end() + 1]
+        pos = base + match.end() + 1
+
+        if first == b"[":
+            if not str(key).isdigit():
+                raise TypeError(f"Cannot look up \"{key}\" in a json array.")
+
+            match, base = self.match(_WHITESPACE, pos)
+            pos = base + match.end()
+            if self.buf[pos:pos + 1] == b"]":
+                raise KeyError(key)
+
+            for _ in range(int(key)):
+                match, base = self.match(_SEPARATOR, self.skip_value(pos))
+                if match is None or not match.group(1) == ",":
+                    raise KeyError(key)
+
+                match, base = self.match(_WHITESPACE, base + match.end())
+                pos = base + match.end()
+
+            return pos
+
+        if not first == b"{":
+            raise TypeError(f"Cannot look up \"{key}\" in a json value.")
+
+        ## compare raw key text first; only keys with escapes need decoding ##
+        raw_key = json.dumps(key, ensure_ascii=False).encode("utf-8").decode("latin-1")
+
+        for this_key, pos in self.members(pos):
+            if this_key == raw_key or ("\\" in this_key and _decode_key(this_key) == key):
+                return pos
+
+        raise KeyError(key)
+
+    def members(self, pos: int) -> "Iterator[tuple[str, int]]":
+        """Yields the raw (still encoded) key and value position of every member of the object whose body starts at byte ``pos``.
+
+        Values are skipped once the consumer asks for the next member.
+        """
+        while True:
+            match, base = self.match(_MEMBER, pos)
+            if match is None:
+                return
+
+            pos = base + match.end()
+            yield match.group(1), pos
+
+            match, base = self.match(_SEPARATOR, self.skip_value(pos))
+            if match is None or not match.group(1) == ",":
+                return
+            pos = base + match.end()
+
+    def keys(self) -> "list[str]|None":
+        """Returns the keys of the top level object, or None if the file holds another type of value."""
+        match, base = self.match(_WHITESPACE, 3 if self.buf[:3] == b"\xef\xbb\xbf" else 0)
+        pos = base + match.end()
+
+        if not self.buf[pos:pos + 1] == b"{":
+            return None
+
+        return [_decode_key(key) for key, _ in self.members(pos + 1)]
+
+
+def _decode_key(raw_key: str) -> str:
+    """Internal function. Decodes a raw object key read by _Scanner."""
+    return json.loads(raw_key.encode("latin-1"))
+
+
+def _read_subtree(fp: str, keys: list[str]) -> tuple[Any, int]:
+    """Internal function. Returns the decoded subtree at ``keys`` and its size in bytes (see: read_subtree)."""
+    with open(fp, "rb") as file, mmap(file.fileno(), 0, access=ACCESS_READ) as buf:
+        scanner = _Scanner(buf)
+        pos = 3 if buf[:3] == b"\xef\xbb\xbf" else 0
+
+        for key in keys:
+            pos = scanner.find_member(pos, key)
+
+        match, base = scanner.match(_WHITESPACE, pos)
+        pos = base + match.end()
+        end = scanner.skip_value(pos)
+        return json.loads(buf[pos:end]), end - pos
+
+
+def read_subtree(fp: str, keys: list[str]) -> Any:
+    """Decodes only the value at the path ``keys`` in the json file at ``fp``.
+
+    The file is memory mapped and scanned without building the rest of the document, so
+    memory use scales with the size of the subtree rather than the size of the file.
+
+    Args:
+        fp (str): The file path.
+        keys (list[str]): The path to the value, e.g. an entry's target field.
+
+    Raises:
+        FileNotFoundError: The file does not exist.
+        KeyError: A key along the path does not exist.
+        TypeError: A value along the path is not an object or array.
+    """
+    return _read_subtree(fp, keys)[0]
+
+
+class ContentCache:
+    """A least recently used cache of parsed unpacked content files.
+
+    Files are keyed on their path and revalidated against their modification time and size,
+    so an edited file is parsed again on its next load. The cache is bounded by the total
+    size of the cached files on disk. It can be shared by mods built concurrently in threads.
+
+    Lookups of a subtree in files larger than ``stream_threshold`` are served with read_subtree,
+    which only decodes (and caches) the requested subtree.
+
+    Args:
+        max_bytes (int, optional): Upper bound for the summed on-disk size of cached data. Defaults to 256 MiB.
+        stream_threshold (int, optional): File size above which subtree lookups don't parse the whole file. Defaults to 8 MiB.
+    """
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024, stream_threshold: int = 8 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.stream_threshold = stream_threshold
+        self._files: "OrderedDict[str|tuple[str], tuple[tuple[int, int], int, Any]]" = OrderedDict()
+        self._size = 0
+        self._lock = RLock()
+
+        self.hits = 0
+        """Number of loads answered from the cache."""
+        self.misses = 0
+        """Number of loads that had to parse the file."""
+
+    def load(self, fp: str, keys: list[str] = None) -> Any:
+        """Returns the parsed contents of the json file at ``fp``, or only the subtree at ``keys``.
+
+        The returned object is shared with other callers and must not be mutated.
+
+        Args:
+            fp (str): The file path.
+            keys (list[str], optional): The path to a subtree of the file, e.g. an entry's target field. Defaults to the whole file.
+
+        Raises:
+            FileNotFoundError: The file does not exist.
+            ValueError: The file is not valid json.
+            KeyError: A key along ``keys`` does not exist.
+            TypeError: A value along ``keys`` is not an object or array.
+        """
+        info = stat(fp)
+        version = (info.st_mtime_ns, info.st_size)
+
+        streamed = bool(keys) and info.st_size > self.stream_threshold
+        cache_key = (fp, *keys) if streamed else fp
+
+        with self._lock:
+            cached = self._files.get(cache_key)
+
+            if not cached is None and cached[0] == version:
+                self._files.move_to_end(cache_key)
+                self.hits += 1
+                return cached[2] if streamed else rec_trav(cached[2], keys)
+
+            self.misses += 1
+
+        if streamed:
+            data, size = _read_subtree(fp, keys)
+        else:
+            with open(fp, "r", encoding="utf-8-sig") as file:
+                data = json.load(file)
+            size = info.st_size
+
+        with self._lock:
+            self.discard(cache_key)
+
+            if size <= self.max_bytes:
+                self._files[cache_key] = (version, size, data)
+                self._size += size
+
+                while self._size > self.max_bytes:
+                    self.discard(next(iter(self._files)))
+
+        return data if streamed else rec_trav(data, keys)
+
+    def discard(self, key: "str|tuple[str]") -> None:
+        """Drops a file (or streamed subtree) from the cache, if cached."""
+        with self._lock:
+            if key in self._files:
+                self._size -= self._files.pop(key)[1]
+
+    def clear(self) -> None:
+        """Drops every cached file."""
+        with self._lock:
+            self._files.clear()
+            self._size = 0
+
+
+INDEX_NAME = ".pytocp-index.json"
+"""Default file name of the persisted content index, kept in the unpacked content folder."""
+
+
+def normalize_target(target: str) -> str:
+    """Returns the form of a Content Patcher target used as a key by ContentIndex.
+
+    Targets are matched case insensitively and with either slash, like Content Patcher does.
+
+    Args:
+        target (str): The target, e.g. "Data/Objects".
+    """
+    return target.replace("\\", "/").strip("/").lower()
+
+
+class ContentIndex:
+    """A persisted index of every json asset in the unpacked content folder.
+
+    The index records each asset's path, modification time and top level keys, so target
+    resolution, existence checks and vanilla key lookups never open the asset files.
+    Build or refresh it with ContentIndex.refresh (see: Mod.IndexContent).
+
+    Args:
+        content_fp (str): The unpacked content folder.
+        index_fp (str, optional): Where to persist the index. Defaults to a file in the content folder.
+    """
+
+    def __init__(self, content_fp: str, index_fp: str = None):
+        self.content_fp = content_fp
+        self.index_fp = join(content_fp, INDEX_NAME) if index_fp is None else index_fp
+
+        self.assets: dict[str, dict[str, Any]] = {}
+        """Indexed assets, keyed by normalized target. Each holds "path", "mtime" and "keys"."""
+        self._keys: dict[str, "frozenset[str]|None"] = {}
+
+        try:
+            with open(self.index_fp, "r") as file:
+                self.assets = json.load(file)
+        except (FileNotFoundError, ValueError):
+            pass
+
+        self._keys = {target: self._key_set(asset) for target, asset in self.assets.items()}
+
+    @staticmethod
+    def _key_set(asset: dict[str, Any]) -> "frozenset[str]|None":
+        """Internal method."""
+        return None if asset["keys"] is None else frozenset(asset["keys"])
+
+    def refresh(self) -> int:
+        """Walks the content folder and (re)indexes every asset whose modification time changed.
+
+        Unchanged assets are only stat-ed. The index is saved if anything changed.
+
+        Returns:
+            int: The number of assets that were (re)indexed or dropped.
+        """
+        seen = set()
+        changed = 0
+
+        for root, _, files in walk(self.content_fp):
+            for name in files:
+                if not name.endswith(".json") or name == INDEX_NAME:
+                    continue
+
+                fp = join(root, name)
+                path = relpath(fp, self.content_fp).replace("\\", "/")
+                target = normalize_target(splitext(path)[0])
+                mtime = stat(fp).st_mtime_ns
+                seen.add(target)
+
+                if target in self.assets and self.assets[target]["mtime"] == mtime:
+                    continue
+
+                try:
+                    with open(fp, "rb") as file, mmap(file.fileno(), 0, access=ACCESS_READ) as buf:
+                        keys = _Scanner(buf).keys()
+                except ValueError:
+                    ## empty (unmappable) or invalid files are indexed without keys ##
+                    keys = None
+
+                self.assets[target] = {"path": path, "mtime": mtime, "keys": keys}
+                self._keys[target] = self._key_set(self.assets[target])
+                changed += 1
+
+        for target in [*self.assets]:
+            if not target in seen:
+                self.assets.pop(target)
+                self._keys.pop(target)
+                changed += 1
+
+        if changed:
+            self.save()
+
+        return changed
+
+    def save(self) -> None:
+        """Writes the index to ``index_fp``."""
+        with open(self.index_fp + ".tmp", "w") as file:
+            json.dump(self.assets, file, separators=(",", ":"))
+        replace(self.index_fp + ".tmp", self.index_fp)
+
+    def resolve(self, target: str) -> "str|None":
+        """Returns the file path for ``target``, or None if there is no such asset."""
+        asset = self.assets.get(normalize_target(target))
+        return None if asset is None else join(self.content_fp, asset["path"])
+
+    def exists(self, target: str) -> bool:
+        """Whether ``target`` is an asset in the unpacked content."""
+        return normalize_target(target) in self.assets
+
+    def has_key(self, target: str, key: str) -> bool:
+        """Whether the top level of ``target`` already has ``key``, e.g. whether an entry id exists in vanilla."""
+        keys = self._keys.get(normalize_target(target))
+        return not keys is None and key in keys
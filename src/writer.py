@@ -0,0 +1,723 @@
+"""
+Output helpers used by Mod.Create.
+
+Important contents:
+    (class) BuildReport
+
+    (class) BuildManifest
+
+    (class) FanOutWriter
+
+    (function) fingerprint
+
+    (class) JsonEncoder
+
+    (class) Stream
+"""
+
+from os.path import join, isfile, dirname
+from os import link, remove, replace, fsync, open as os_open, close, O_RDONLY
+from typing import Any, Callable, Iterable, Iterator
+from itertools import islice
+from collections.abc import Mapping
+from hashlib import sha1
+from helper import json_default, flatten
+import json
+
+BUILD_MANIFEST_NAME = ".pytocp-build.json"
+"""File name of the build manifest kept in every compiled mod folder."""
+
+
+STREAM_DEPTH = 4
+"""Container levels JsonEncoder.iterencode writes item by item: the document, its change list, each change and its Entries. Deeper values are encoded whole."""
+CHUNK_SIZE = 1 << 16
+"""Approximate size of the chunks JsonEncoder.iterencode yields, in characters."""
+STREAM_BATCH = 64
+"""Items of the deepest streamed containers (e.g. Entries) encoded per call, sharing the encoder's setup cost."""
+
+
+class Stream:
+    """A json array whose items are generated while it is encoded, e.g. the changes of a content file.
+
+    Every iteration calls ``factory`` again, so a document can be fingerprinted and then written
+    without ever holding all of its items in memory. Anywhere else (e.g. when pickled for a
+    build worker) it behaves like a plain list.
+
+    Args:
+        factory (Callable[[], Iterable[Any]]): Returns a new iterable over the items.
+    """
+
+    __slots__ = ("factory",)
+
+    def __init__(self, factory: Callable[[], Iterable[Any]]):
+        self.factory = factory
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self.factory())
+
+    def __reduce__(self) -> tuple:
+        return (list, ([*self],))
+
+
+def _default(value: Any) -> Any:
+    """Internal function. ``default`` hook for the output encoders; also flattens Stream into a list."""
+    if isinstance(value, Stream):
+        return [*value]
+    return json_default(value)
+
+
+def _encode_key(key: Any, encode: Callable[[Any], str]) -> str:
+    """Internal function. Encodes a dict key the way the json module does, converting non-string keys."""
+    if not isinstance(key, str):
+        if key is True:
+            key = "true"
+        elif key is False:
+            key = "false"
+        elif key is None:
+            key = "null"
+        elif isinstance(key, (int, float)):
+            key = json.dumps(key)
+        else:
+            raise TypeError(f"keys must be str, int, float, bool or None, not {key.__class__.__name__}")
+
+    return encode(key)
+
+
+_ORJSON = None
+"""The orjson module, once imported (False if it isn't installed)."""
+
+
+def _orjson() -> Any:
+    """Internal function. Returns the orjson module, or None if it isn't installed."""
+    global _ORJSON
+
+    if _ORJSON is None:
+        try:
+            import orjson
+            _ORJSON = orjson
+        except ImportError:
+            _ORJSON = False
+
+    return _ORJSON or None
+
+
+class JsonEncoder:
+    """Encodes json documents for the output files (see: Mod.encoder).
+
+    Args:
+        compact (bool, optional): Write minified json, with no indentation or extra whitespace. Defaults to False (readable, indented json).
+        backend (str, optional): "json" for the standard library, "orjson" for the much faster orjson package, or "auto" to use orjson when it is installed. Defaults to "json", so the output doesn't depend on what is installed.
+
+    Raises:
+        ValueError: The backend is unknown.
+        ImportError: The "orjson" backend was requested but orjson isn't installed.
+    """
+
+    BACKENDS = ("auto", "json", "orjson")
+
+    def __init__(self, compact: bool = False, backend: str = "json"):
+        if not backend in self.BACKENDS:
+            raise ValueError(f"Unknown json backend \"{backend}\". Expected one of {', '.join(self.BACKENDS)}.")
+
+        if backend == "orjson" and _orjson() is None:
+            raise ImportError("The orjson json backend was requested, but orjson isn't installed.")
+
+        self.compact = compact
+        self.backend = backend
+
+    @property
+    def name(self) -> str:
+        """The backend in use, "json" or "orjson"."""
+        if self.backend == "auto":
+            return "json" if _orjson() is None else "orjson"
+        return self.backend
+
+    @property
+    def signature(self) -> str:
+        """Identifies the output format, so incremental builds rewrite files when it changes."""
+        return f"{self.name}:{'compact' if self.compact else 'indented'}"
+
+    def encode(self, document: Any) -> bytes:
+        """Encodes a json document the way it is written to disk.
+
+        orjson indents with 2 spaces and writes non-ascii text as utf-8; the standard library
+        indents with 4 spaces and escapes it. Values orjson can't encode (e.g. integers over
+        64 bits) fall back to the standard library in orjson's format, the same way as in
+        JsonEncoder.iterencode, so streamed and parallel builds stay byte-identical.
+
+        Args:
+            document (Any): The json serializable document.
+
+        Returns:
+            bytes: The encoded document.
+        """
+        if self.name == "orjson":
+            orjson = _orjson()
+            option = orjson.OPT_NON_STR_KEYS | (0 if self.compact else orjson.OPT_INDENT_2)
+
+            try:
+                return orjson.dumps(document, default=_default, option=option)
+            except TypeError:
+                return b"".join(self.iterencode(document))
+
+        if self.compact:
+            return json.dumps(document, separators=(",", ":"), default=_default).encode("utf-8")
+
+        return json.dumps(document, indent=4, default=_default).encode("utf-8")
+
+    def _value_encoder(self) -> Callable[[Any], str]:
+        """Internal method. Returns a function encoding one value the way JsonEncoder.encode would, at the top level."""
+        if self.name == "orjson":
+            orjson = _orjson()
+            option = orjson.OPT_NON_STR_KEYS | (0 if self.compact else orjson.OPT_INDENT_2)
+            fallback = json.JSONEncoder(
+                ensure_ascii=False,
+                indent=None if self.compact else 2,
+                separators=(",", ":") if self.compact else (",", ": "),
+                default=_default
+            ).encode
+
+            def encode(value: Any) -> str:
+                try:
+                    return orjson.dumps(value, default=_default, option=option).decode("utf-8")
+                except TypeError:
+                    return fallback(value)
+
+            return encode
+
+        if self.compact:
+            return json.JSONEncoder(separators=(",", ":"), default=_default).encode
+
+        return json.JSONEncoder(indent=4, default=_default).encode
+
+    def iterencode(self, document: Any) -> Iterator[bytes]:
+        """Encodes a json document piece by piece, for writing it without holding it in memory.
+
+        Containers down to STREAM_DEPTH levels (the document, its change list, every change and
+        its Entries) are written item by item, and Stream values are generated as they are
+        written. Deeper values are encoded whole and re-indented, so the output is byte-identical
+        to JsonEncoder.encode. With orjson, values it can't encode fall back to the standard
+        library one by one, keeping orjson's indentation and utf-8 text.
+
+        Args:
+            document (Any): The json serializable document.
+
+        Returns:
+            Iterator[bytes]: The encoded document, in chunks of about CHUNK_SIZE characters.
+        """
+        encode = self._value_encoder()
+        indent = None if self.compact else (2 if self.name == "orjson" else 4)
+        key_separator = ":" if self.compact else ": "
+
+        parts = []
+        size = 0
+
+        for part in self._iterencode(document, encode, indent, key_separator, 0):
+            parts.append(part)
+            size += len(part)
+
+            if size >= CHUNK_SIZE:
+                yield "".join(parts).encode("utf-8")
+                parts = []
+                size = 0
+
+        if len(parts) > 0:
+            yield "".join(parts).encode("utf-8")
+
+    def _iterencode(self, value: Any, encode: Callable[[Any], str], indent: "int|None", key_separator: str, level: int) -> Iterator[str]:
+        """Internal method. Yields the encoded pieces of ``value``, nested ``level`` containers deep."""
+        items = None
+
+        if level < STREAM_DEPTH:
+            if isinstance(value, Mapping):
+                ## dict.items reads a LayeredDict in place, without copying its shared values ##
+                items = iter(dict.items(value) if isinstance(value, dict) else dict(value).items())
+                opener, closer = "{", "}"
+            elif isinstance(value, (list, tuple, Stream)):
+                items = iter(value)
+                opener, closer = "[", "]"
+
+        if items is None:
+            text = encode(flatten(value))
+            yield text.replace("\n", "\n" + " " * (indent * level)) if indent else text
+            return
+
+        is_mapping = opener == "{"
+        first = True
+
+        if level + 1 == STREAM_DEPTH:
+            ## the items are encoded whole, so encode a batch of them at once and drop its brackets ##
+            newline = "" if indent is None else "\n" + " " * (indent * level)
+            trim = 1 if indent is None else 2
+
+            while True:
+                batch = [*islice(items, STREAM_BATCH)]
+                if len(batch) == 0:
+                    break
+
+                text = encode({key: flatten(item) for key, item in batch} if is_mapping else [*map(flatten, batch)])[1:-trim]
+                yield (opener if first else ",") + (text.replace("\n", newline) if indent else text)
+                first = False
+
+            yield opener + closer if first else newline + closer
+            return
+
+        newline = "" if indent is None else "\n" + " " * (indent * (level + 1))
+
+        for item in items:
+            prefix = opener + newline if first else "," + newline
+            first = False
+
+            if is_mapping:
+                key, item = item
+                prefix += _encode_key(key, encode) + key_separator
+
+            if level + 1 < STREAM_DEPTH and isinstance(item, (Mapping, list, tuple, Stream)):
+                yield prefix
+                yield from self._iterencode(item, encode, indent, key_separator, level + 1)
+            elif indent:
+                ## scalars and deeper values are encoded in one go, without a nested generator ##
+                yield prefix + encode(flatten(item)).replace("\n", newline)
+            else:
+                yield prefix + encode(flatten(item))
+
+        if first:
+            yield opener + closer
+        else:
+            yield ("" if indent is None else "\n" + " " * (indent * level)) + closer
+
+
+_FINGERPRINT_ENCODER = JsonEncoder(compact=True)
+"""Encodes documents for fingerprint."""
+
+
+def fingerprint(obj: Any, salt: str = "") -> str:
+    """Returns a stable fingerprint for a json document.
+
+    The document is encoded compactly, which is much cheaper than the indented output that is
+    written to disk, so unchanged documents can be skipped before they are pretty-printed. It is
+    hashed chunk by chunk (see: JsonEncoder.iterencode), so the encoding is never held in memory.
+
+    Args:
+        obj (Any): The json serializable document.
+        salt (str, optional): Extra data mixed into the fingerprint, such as output options. Defaults to "".
+
+    Returns:
+        str: A hex digest of the document.
+    """
+    digest = sha1(salt.encode("utf-8"))
+
+    for chunk in _FINGERPRINT_ENCODER.iterencode(obj):
+        digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+class BuildReport:
+    """What a call to Mod.Create wrote and skipped.
+
+    Args:
+        written (list[str]): File paths that were (re)written.
+        skipped (list[str]): File paths that were left untouched because their inputs did not change.
+        removed (list[str]): File paths of generated files that are no longer part of the mod.
+        failed (list[tuple[str, str]]): Compiled mod folders that were left untouched, with the error that blocked each one.
+        profile (dict[str, Any] | None): Where the build's time went, if Mod.PROFILE was set (see: Profiler.report).
+    """
+
+    def __init__(self):
+        self.written: list[str] = []
+        """File paths that were (re)written."""
+        self.skipped: list[str] = []
+        """File paths that were left untouched because their inputs did not change."""
+        self.profile: "dict[str, Any]|None" = None
+        """Where the build's time went, if Mod.PROFILE was set (see: Profiler.report)."""
+        self.removed: list[str] = []
+        """File paths of generated files that are no longer part of the mod, such as old shards (see: Mod.sharding)."""
+        self.failed: list[tuple[str, str]] = []
+        """Compiled mod folders that were left untouched, each with the error that blocked it (e.g. an unreadable asset)."""
+
+    def summary(self) -> str:
+        """Returns a one line, human readable summary of the build."""
+        summary = f"Rewrote {len(self.written)} file(s), skipped {len(self.skipped)} unchanged file(s)"
+        if len(self.removed) > 0:
+            summary += f", removed {len(self.removed)} stale file(s)"
+        if len(self.failed) > 0:
+            summary += f", failed to update {len(self.failed)} folder(s)"
+        return summary + "."
+
+    def __repr__(self) -> str:
+        return f"BuildReport(written={self.written!r}, skipped={self.skipped!r}, failed={self.failed!r})"
+
+
+class BuildManifest:
+    """The persisted fingerprints of every file written to one compiled mod folder.
+
+    It also lists the generated files (e.g. shards, see: Mod.sharding) the folder holds, so a
+    later build can delete the ones it no longer generates without touching the user's files.
+
+    Args:
+        mod_dir (str): The compiled mod folder.
+    """
+
+    def __init__(self, mod_dir: str):
+        self.mod_dir = mod_dir
+        self.fp = join(mod_dir, BUILD_MANIFEST_NAME)
+        self.fingerprints: dict[str, str] = {}
+        self.generated: list[str] = []
+        """Paths of the generated files in the folder, within the mod folder."""
+        self.exists = False
+        """Whether the folder already had a manifest."""
+
+        try:
+            with open(self.fp, "r") as file:
+                data = json.load(file)
+            self.exists = True
+        except (FileNotFoundError, ValueError):
+            return
+
+        ## older manifests only hold the fingerprints ##
+        if isinstance(data.get("fingerprints"), dict):
+            self.fingerprints = data["fingerprints"]
+            self.generated = data.get("generated", [])
+        else:
+            self.fingerprints = data
+
+    def clear(self) -> None:
+        """Forgets every fingerprint, e.g. before a full build rewrites the folder."""
+        self.fingerprints = {}
+
+    def unchanged(self, relpath: str, digest: str) -> bool:
+        """Whether ``relpath`` was last written from inputs with the fingerprint ``digest`` and still exists.
+
+        Args:
+            relpath (str): Path of the file within the mod folder.
+            digest (str): Fingerprint of the current inputs.
+        """
+        return self.fingerprints.get(relpath) == digest and isfile(join(self.mod_dir, relpath))
+
+    def record(self, relpath: str, digest: str) -> None:
+        """Records the fingerprint a file was written with."""
+        self.fingerprints[relpath] = digest
+
+    def forget(self, relpath: str) -> None:
+        """Drops the fingerprint of a file that is no longer written."""
+        self.fingerprints.pop(relpath, None)
+
+    def encode(self) -> bytes:
+        """Returns the manifest as bytes, ready to be written back to the mod folder."""
+        return json.dumps({"fingerprints": self.fingerprints, "generated": self.generated}, indent=4).encode("utf-8")
+
+
+def _write_bytes(fp: str, data: bytes) -> None:
+    """Internal function. Writes ``data`` to ``fp``, closing the file afterwards."""
+    with open(fp, "wb") as file:
+        file.write(data)
+
+
+def _remove_quietly(fp: str) -> None:
+    """Internal function. Removes a file, ignoring errors."""
+    try:
+        remove(fp)
+    except OSError:
+        pass
+
+
+def _sync_folder(fp: str) -> None:
+    """Internal function. Syncs a folder's entries (e.g. renamed files) to disk, where the platform allows it."""
+    try:
+        fd = os_open(fp, O_RDONLY)
+    except OSError:
+        ## e.g. Windows can't open folders ##
+        return
+
+    try:
+        fsync(fd)
+    except OSError:
+        pass
+    finally:
+        close(fd)
+
+
+def _reflink(src: str, dst: str) -> None:
+    """Internal function. Clones ``src`` to ``dst`` with a copy-on-write reflink (Linux only).
+
+    Raises:
+        OSError: The filesystem (or platform) doesn't support reflinks.
+    """
+    from fcntl import ioctl
+
+    FICLONE = 0x40049409
+
+    with open(src, "rb") as src_file, open(dst, "wb") as dst_file:
+        ioctl(dst_file.fileno(), FICLONE, src_file.fileno())
+
+
+class FanOutWriter:
+    """Writes the same bytes to several compiled mod folders, one whole file at a time.
+
+    Every document is encoded once by the caller; the writer only fans the buffer out,
+    in parallel when there is more than one folder. Files are staged next to their
+    destination and only renamed into place by FanOutWriter.commit, once every file of a
+    folder has been written and synced, so readers (e.g. a Content Patcher reload) never
+    see a half-written file, and a folder with a file that couldn't be written isn't touched.
+
+    Args:
+        mod_dirs (list[str]): The compiled mod folders to write to.
+        link_mode (str, optional): How copied assets reach every folder after the first. One of "copy", "hardlink" or "reflink". Defaults to "copy".
+    """
+
+    LINK_MODES = ("copy", "hardlink", "reflink")
+    STAGE_SUFFIX = ".pytocp-tmp"
+    BACKUP_SUFFIX = ".pytocp-old"
+
+    def __init__(self, mod_dirs: list[str], link_mode: str = "copy"):
+        if not link_mode in self.LINK_MODES:
+            raise ValueError(f"Unknown link mode \"{link_mode}\". Expected one of {', '.join(self.LINK_MODES)}.")
+
+        self.mod_dirs = mod_dirs
+        self.link_mode = link_mode
+        self._pool = None
+        self._staged: dict[str, dict[str, None]] = {mod_dir: {} for mod_dir in mod_dirs}
+        """Staged file paths (without the stage suffix) per folder, as an ordered set."""
+        self._failed: dict[str, str] = {}
+        """Folders where staging a file failed, with the first error. These are not committed."""
+        self.failed: dict[str, str] = {}
+        """Folders the last FanOutWriter.commit left untouched, with the first error that blocked them."""
+
+    def _fail(self, mod_dir: str, reason: str) -> None:
+        """Internal method. Prints ``reason`` and marks a folder as failed, keeping its first error."""
+        print(reason)
+        self._failed.setdefault(mod_dir, reason)
+
+    def _map(self, func, mod_dirs: list[str]) -> list[Any]:
+        """Internal method. Runs ``func`` for every folder, in parallel if there is more than one."""
+        if len(mod_dirs) < 2:
+            return [*map(func, mod_dirs)]
+
+        if self._pool is None:
+            from concurrent.futures import ThreadPoolExecutor
+            self._pool = ThreadPoolExecutor(max_workers=len(self.mod_dirs))
+
+        return [*self._pool.map(func, mod_dirs)]
+
+    def _stage(self, mod_dir: str, relpath: str, stage_func) -> bool:
+        """Internal method. Stages one file with ``stage_func(staged_fp)``, recording failures."""
+        fp = join(mod_dir, relpath)
+        try:
+            stage_func(fp + self.STAGE_SUFFIX)
+        except Exception as e:
+            self._fail(mod_dir, f"Couldn't write {relpath} with error: {e}")
+            return False
+
+        self._staged[mod_dir][fp] = None
+        return True
+
+    def write(self, relpath: str, data: bytes, mod_dirs: list[str] = None) -> None:
+        """Stages ``data`` for ``relpath`` in every folder.
+
+        Args:
+            relpath (str): Path of the file within the mod folder.
+            data (bytes): The encoded file contents.
+            mod_dirs (list[str], optional): Subset of the folders to write to. Defaults to every folder.
+        """
+        self._map(
+            lambda mod_dir: self._stage(mod_dir, relpath, lambda staged_fp: _write_bytes(staged_fp, data)),
+            self.mod_dirs if mod_dirs is None else mod_dirs
+        )
+
+    def stream(self, relpath: str, chunks: Iterable[bytes], mod_dirs: list[str] = None) -> None:
+        """Stages ``relpath`` in every folder from chunks of bytes, as they are produced.
+
+        Every chunk is written to each folder before the next one is requested, so the whole
+        file is never held in memory (see: JsonEncoder.iterencode).
+
+        Args:
+            relpath (str): Path of the file within the mod folder.
+            chunks (Iterable[bytes]): The encoded file contents, in order.
+            mod_dirs (list[str], optional): Subset of the folders to write to. Defaults to every folder.
+        """
+        files = {}
+
+        for mod_dir in self.mod_dirs if mod_dirs is None else mod_dirs:
+            fp = join(mod_dir, relpath)
+            try:
+                files[mod_dir] = open(fp + self.STAGE_SUFFIX, "wb")
+            except Exception as e:
+                self._fail(mod_dir, f"Couldn't write {relpath} with error: {e}")
+                continue
+
+            self._staged[mod_dir][fp] = None
+
+        try:
+            for chunk in chunks:
+                for mod_dir, file in [*files.items()]:
+                    try:
+                        file.write(chunk)
+                    except Exception as e:
+                        self._fail(mod_dir, f"Couldn't write {relpath} with error: {e}")
+                        file.close()
+                        del files[mod_dir]
+        finally:
+            for file in files.values():
+                file.close()
+
+    def copy(self, relpath: str, src: str, mod_dirs: list[str] = None) -> None:
+        """Stages a copy of the file at ``src`` for ``relpath`` in every folder, reading the source once.
+
+        With the "hardlink" or "reflink" link mode, only the first folder receives a real copy and
+        the others link to it, falling back to a plain write when linking isn't possible
+        (e.g. the folders are on different filesystems).
+
+        Args:
+            relpath (str): Path of the file within the mod folder.
+            src (str): The source file path.
+            mod_dirs (list[str], optional): Subset of the folders to write to. Defaults to every folder.
+        """
+        mod_dirs = self.mod_dirs if mod_dirs is None else mod_dirs
+
+        try:
+            with open(src, "rb") as file:
+                data = file.read()
+        except Exception as e:
+            print(f"Couldn't read asset {src} with error: {e}")
+            for mod_dir in mod_dirs:
+                self._failed.setdefault(mod_dir, f"Couldn't read asset {src} with error: {e}")
+            return
+
+        if self.link_mode == "copy" or len(mod_dirs) < 2:
+            return self.write(relpath, data, mod_dirs)
+
+        if not self._stage(mod_dirs[0], relpath, lambda staged_fp: _write_bytes(staged_fp, data)):
+            return self.write(relpath, data, mod_dirs[1:])
+
+        first = join(mod_dirs[0], relpath) + self.STAGE_SUFFIX
+
+        def link_to(staged_fp: str) -> None:
+            try:
+                if isfile(staged_fp):
+                    remove(staged_fp)
+                if self.link_mode == "hardlink":
+                    link(first, staged_fp)
+                else:
+                    _reflink(first, staged_fp)
+            except OSError:
+                _write_bytes(staged_fp, data)
+
+        self._map(lambda mod_dir: self._stage(mod_dir, relpath, link_to), mod_dirs[1:])
+
+    def commit(self) -> list[str]:
+        """Syncs every staged file to disk, then renames each folder's files into place.
+
+        A folder is only switched over once all of its files are written and synced, but the
+        renames happen one by one, so a reader may briefly see some new and some old files. The
+        root content.json and manifest.json are renamed last, so the files they include are in
+        place first. If a rename fails, the files already renamed in that folder are put back.
+        Folders that failed are listed in FanOutWriter.failed.
+
+        Returns:
+            list[str]: The file paths that were committed.
+        """
+        def sync_all(mod_dir: str) -> None:
+            try:
+                for fp in self._staged[mod_dir]:
+                    with open(fp + self.STAGE_SUFFIX, "rb") as file:
+                        fsync(file.fileno())
+            except OSError as e:
+                self._fail(mod_dir, f"Couldn't sync {fp[len(mod_dir) + 1:]} with error: {e}")
+
+        self._map(sync_all, [mod_dir for mod_dir in self.mod_dirs if not mod_dir in self._failed])
+
+        committed = []
+
+        for mod_dir in self.mod_dirs:
+            if mod_dir in self._failed:
+                print(f"Not updating {mod_dir}, since some files couldn't be written.")
+                continue
+
+            committed += self._switch(mod_dir)
+
+        self.failed = dict(self._failed)
+        self.abort()
+        return committed
+
+    def _switch(self, mod_dir: str) -> list[str]:
+        """Internal method. Renames a folder's staged files into place, and syncs the renames.
+
+        Every replaced file is first hardlinked to a backup, so a failed rename can be undone.
+        Files that can't be linked (e.g. on filesystems without hardlinks) can't be put back.
+        Backups are "" for new files, and None for files that couldn't be linked.
+
+        Returns:
+            list[str]: The file paths that were committed, or none if a rename failed.
+        """
+        last = {join(mod_dir, "content.json"), join(mod_dir, "manifest.json")}
+        order = sorted(self._staged[mod_dir], key=lambda fp: fp in last)
+        done: list[tuple[str, "str|None"]] = []
+
+        for fp in order:
+            backup = fp + self.BACKUP_SUFFIX
+
+            try:
+                if isfile(backup):
+                    remove(backup)
+                link(fp, backup)
+            except FileNotFoundError:
+                ## a new file; undoing it removes it ##
+                backup = ""
+            except OSError:
+                backup = None
+
+            try:
+                replace(fp + self.STAGE_SUFFIX, fp)
+            except OSError as e:
+                if backup:
+                    _remove_quietly(backup)
+
+                ## put the folder back the way it was, newest first ##
+                lost = 0
+                for done_fp, done_backup in reversed(done):
+                    try:
+                        if done_backup is None:
+                            lost += 1
+                        elif done_backup == "":
+                            remove(done_fp)
+                        else:
+                            replace(done_backup, done_fp)
+                    except OSError:
+                        lost += 1
+
+                restored = "The folder was restored." if lost == 0 else f"{lost} replaced file(s) couldn't be restored."
+                self._fail(mod_dir, f"Couldn't move {fp[len(mod_dir) + 1:]} into place with error: {e}. {restored}")
+                return []
+
+            done.append((fp, backup))
+
+        for fp, backup in done:
+            if backup:
+                _remove_quietly(backup)
+
+        for folder in dict.fromkeys(dirname(fp) for fp in order):
+            _sync_folder(folder)
+
+        return order
+
+    def abort(self) -> None:
+        """Removes any staged files that were not committed."""
+        for mod_dir in self.mod_dirs:
+            for fp in self._staged[mod_dir]:
+                try:
+                    remove(fp + self.STAGE_SUFFIX)
+                except FileNotFoundError:
+                    pass
+
+            self._staged[mod_dir] = {}
+
+        self._failed = {}
+
+    def close(self) -> None:
+        """Removes uncommitted files and shuts down the worker threads, if any were started."""
+        self.abort()
+
+        if not self._pool is None:
+            self._pool.shutdown()
+            self._pool = None